@@ -1,12 +1,329 @@
+import time
+import tracemalloc
+
+# Cold start is traced from here, before pygame and numpy load
+STARTUP_T0 = time.perf_counter()
+
 import pygame
+import numpy as np
+import argparse
 import random
 import os
 import sys
 import math
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import weakref
+import multiprocessing
+import multiprocessing.connection
+from multiprocessing import shared_memory
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ================== CONFIG ==================
+# Frames rendered by a headless run when no frame count is given
+HEADLESS_DEFAULT_FRAMES = 300
+
+# Frames between memory instrumentation samples (10 s at SIM_FPS)
+MEMORY_DEFAULT_INTERVAL = 300
+
+# Frame rate all per-frame tuning (speeds, timers, chances) is expressed in.
+# The simulation scales by real elapsed time, so any target FPS looks the same.
+SIM_FPS = 30
+
+
+# Rain detail levels, best first. The quality governor steps through these
+# to hold the frame budget; "high" matches the original fixed settings.
+QUALITY_LEVELS = (
+    {"name": "ultra", "trail_length": 14, "column_density": 2, "effect_chance_scale": 1.0,
+     "max_word_rains": 16, "glitch_line_count": 12},
+    {"name": "high", "trail_length": 10, "column_density": 2, "effect_chance_scale": 1.0,
+     "max_word_rains": 8, "glitch_line_count": 8},
+    {"name": "medium", "trail_length": 8, "column_density": 1.5, "effect_chance_scale": 0.6,
+     "max_word_rains": 4, "glitch_line_count": 5},
+    {"name": "low", "trail_length": 6, "column_density": 1, "effect_chance_scale": 0.3,
+     "max_word_rains": 2, "glitch_line_count": 3},
+    {"name": "minimal", "trail_length": 4, "column_density": 1, "effect_chance_scale": 0.15,
+     "max_word_rains": 1, "glitch_line_count": 2},
+)
+QUALITY_NAMES = tuple(level["name"] for level in QUALITY_LEVELS)
+QUALITY_DEFAULT_LEVEL = QUALITY_NAMES.index("high")
+
+
+RECORD_DEFAULT_BUFFERS = 8
+RECORD_VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".mov", ".avi", ".gif")
+RENDERER_BACKENDS = ("surface", "sdl2")
+FEED_DEFAULT_RATE = 4.0
+FEED_DEFAULT_QUEUE = 256
+
+
+def env_flag(name: str) -> bool:
+    """True if the environment variable is set to anything but '' or '0'."""
+    return os.environ.get(name, "") not in ("", "0")
+
+
+def parse_resolution(value: str):
+    """Parse a WIDTHxHEIGHT string such as '1920x1080'."""
+    try:
+        w, h = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f"resolution must be positive, got {value!r}")
+    return w, h
+
+
+def parse_args(argv=None):
+    """Parse command-line options. Environment variables provide the defaults."""
+    parser = argparse.ArgumentParser(description="VisionBreaker: Neurogrid Terminal")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=env_flag("VISIONBREAKER_HEADLESS"),
+        help="render offscreen with the SDL dummy driver, no boot screen "
+        "(env: VISIONBREAKER_HEADLESS=1)",
+    )
+    parser.add_argument(
+        "--resolution",
+        type=parse_resolution,
+        default=os.environ.get("VISIONBREAKER_RESOLUTION"),
+        help="WIDTHxHEIGHT of the headless canvas or of the starting window "
+        "(env: VISIONBREAKER_RESOLUTION)",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=int(os.environ.get("VISIONBREAKER_FRAMES", "0")),
+        help=f"stop after this many frames (headless default: {HEADLESS_DEFAULT_FRAMES}) "
+        "(env: VISIONBREAKER_FRAMES)",
+    )
+    parser.add_argument(
+        "--screenshot",
+        metavar="PATH",
+        help="save the final scene to an image file when the run ends",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=os.environ.get("VISIONBREAKER_FPS"),
+        help=f"target frame rate, 0 for uncapped (default: {SIM_FPS}, or 0 with --vsync) "
+        "(env: VISIONBREAKER_FPS)",
+    )
+    parser.add_argument(
+        "--vsync",
+        action="store_true",
+        help="sync presentation to the display refresh, which then paces the frames unless "
+        "--fps is given; the window uses pygame's SCALED mode, which SDL needs for vsync",
+    )
+    parser.add_argument(
+        "--render-scale",
+        type=float,
+        default=float(os.environ.get("VISIONBREAKER_RENDER_SCALE", "1.0")),
+        help="render the rain at this fraction of the screen resolution and "
+        "upscale it, e.g. 0.5 or 0.66 (env: VISIONBREAKER_RENDER_SCALE)",
+    )
+    parser.add_argument(
+        "--smooth-scale",
+        action="store_true",
+        help="upscale a reduced render scale with smoothscale instead of scale",
+    )
+    parser.add_argument(
+        "--quality",
+        choices=("auto",) + QUALITY_NAMES,
+        default=os.environ.get("VISIONBREAKER_QUALITY", "auto"),
+        help="rain detail level, or auto to adapt it to the frame time "
+        "(env: VISIONBREAKER_QUALITY)",
+    )
+    parser.add_argument(
+        "--feed",
+        metavar="PATH",
+        default=os.environ.get("VISIONBREAKER_FEED"),
+        help="stream lines of a file ('-' for stdin) into word rains (env: VISIONBREAKER_FEED)",
+    )
+    parser.add_argument(
+        "--feed-follow",
+        action="store_true",
+        help="follow --feed like tail -f: start at its end and wait for new lines",
+    )
+    parser.add_argument(
+        "--feed-rate",
+        type=float,
+        default=FEED_DEFAULT_RATE,
+        help=f"feed lines spawned per second at most (default: {FEED_DEFAULT_RATE})",
+    )
+    parser.add_argument(
+        "--feed-queue",
+        type=int,
+        default=FEED_DEFAULT_QUEUE,
+        help=f"feed lines buffered before old ones are dropped (default: {FEED_DEFAULT_QUEUE})",
+    )
+    parser.add_argument(
+        "--palette",
+        action="store_true",
+        default=env_flag("VISIONBREAKER_PALETTE"),
+        help="draw the scene in 8-bit indexed color; theme changes cross-fade "
+        "(env: VISIONBREAKER_PALETTE=1)",
+    )
+    parser.add_argument(
+        "--render-threads",
+        type=int,
+        default=int(os.environ.get("VISIONBREAKER_RENDER_THREADS", "1")),
+        help="draw the rain in this many vertical strips on a thread pool "
+        "(default: 1, serial) (env: VISIONBREAKER_RENDER_THREADS)",
+    )
+    parser.add_argument(
+        "--render-processes",
+        type=int,
+        default=int(os.environ.get("VISIONBREAKER_RENDER_PROCESSES", "0")),
+        metavar="N",
+        help="draw the rain in N worker processes into shared-memory frames that this "
+        "process only composites with the UI (default: 0, off) "
+        "(env: VISIONBREAKER_RENDER_PROCESSES)",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=RENDERER_BACKENDS,
+        default=os.environ.get("VISIONBREAKER_RENDERER", "surface"),
+        help="draw with Surface blits, or with an SDL2 Renderer and resident glyph textures, "
+        "GPU-accelerated where available (env: VISIONBREAKER_RENDERER)",
+    )
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="present only the screen regions that changed (low-power / windowed)",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="record every frame: a PNG sequence (frames/ or frame_%%06d.png) "
+        f"or a video through ffmpeg ({', '.join(RECORD_VIDEO_EXTENSIONS)})",
+    )
+    parser.add_argument(
+        "--record-source",
+        choices=("screen", "scene"),
+        default="screen",
+        help="record the presented screen with UI, or the rain scene alone "
+        "(headless runs always record the scene)",
+    )
+    parser.add_argument(
+        "--record-buffers",
+        type=int,
+        default=RECORD_DEFAULT_BUFFERS,
+        help=f"frames the capture ring buffer holds for the writer (default: {RECORD_DEFAULT_BUFFERS})",
+    )
+    parser.add_argument(
+        "--record-input",
+        metavar="PATH",
+        help="log every frame's time and key events (boot screen included) to PATH",
+    )
+    parser.add_argument(
+        "--replay-input",
+        metavar="PATH",
+        help="replay a --record-input log: same seed, frame times and keys",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="show the frame profiler overlay at startup (toggle with F3)",
+    )
+    parser.add_argument(
+        "--profile-log",
+        metavar="PATH",
+        help="stream per-frame stage timings to PATH (.csv, otherwise JSON lines)",
+    )
+    parser.add_argument(
+        "--memory-log",
+        metavar="PATH",
+        default=os.environ.get("VISIONBREAKER_MEMORY_LOG"),
+        help="sample RSS, Python allocations and Surface counts to PATH as JSON lines "
+        "(env: VISIONBREAKER_MEMORY_LOG)",
+    )
+    parser.add_argument(
+        "--memory-interval",
+        type=int,
+        default=MEMORY_DEFAULT_INTERVAL,
+        metavar="FRAMES",
+        help=f"frames between memory samples (default: {MEMORY_DEFAULT_INTERVAL})",
+    )
+    parser.add_argument(
+        "--tiles",
+        type=int,
+        default=int(os.environ.get("VISIONBREAKER_TILES", "1")),
+        metavar="N",
+        help="render the --resolution canvas as a video wall of N side-by-side tiles, "
+        "one worker process each (env: VISIONBREAKER_TILES)",
+    )
+    parser.add_argument(
+        "--tile-output",
+        choices=("window", "shared"),
+        default="window",
+        help="show each tile in its own window, or write them into one shared-memory "
+        "framebuffer (headless runs always do)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed the random generators for a reproducible run",
+    )
+    parser.add_argument(
+        "--startup-trace",
+        action="store_true",
+        default=env_flag("VISIONBREAKER_STARTUP_TRACE"),
+        help="print startup milestones in ms since launch to stderr "
+        "(env: VISIONBREAKER_STARTUP_TRACE=1)",
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=float(os.environ.get("VISIONBREAKER_STARTUP_BUDGET", "0")),
+        metavar="MS",
+        help="warn on stderr when the first frame takes longer than this after launch "
+        "(env: VISIONBREAKER_STARTUP_BUDGET)",
+    )
+    args = parser.parse_args(argv)
+    if args.fps is None:
+        # With vsync the display refresh paces the frames
+        args.fps = 0 if args.vsync else SIM_FPS
+    return args
+
+
+# Only the script entry point reads the command line; importers get env defaults
+config = parse_args(sys.argv[1:] if __name__ == "__main__" else [])
+
+
+# ==== STARTUP TRACE ====
+# (label, ms since STARTUP_T0). Background loaders add their marks too.
+startup_marks = []
+startup_reported = False
+
+
+def startup_mark(label):
+    """Note a startup milestone; printed right away with --startup-trace."""
+    ms = (time.perf_counter() - STARTUP_T0) * 1000.0
+    startup_marks.append((label, ms))
+    if config.startup_trace:
+        print(f"[startup] {ms:8.1f} ms  {label}", file=sys.stderr)
+
+
+def finish_startup():
+    """Mark the first rendered frame and check it against --startup-budget."""
+    global startup_reported
+    if startup_reported:
+        return
+    startup_reported = True
+    startup_mark("first frame")
+    total = startup_marks[-1][1]
+    if config.startup_budget > 0 and total > config.startup_budget:
+        print(
+            f"[startup] first frame after {total:.1f} ms, over the "
+            f"{config.startup_budget:.0f} ms budget",
+            file=sys.stderr,
+        )
 
-# ================== INIT ==================
-pygame.init()
-pygame.mixer.init()
 
 def resource_path(relative_path: str) -> str:
     """
@@ -47,37 +364,56 @@ def init_audio():
     except Exception:
         music_loaded = False
 
-    # Hack confirm SFX
-    try:
-        sfx_hack = pygame.mixer.Sound(SFX_HACK_FILE)
-        sfx_hack.set_volume(0.6)
-    except Exception:
-        sfx_hack = None
+    # SFX are published only once ready, since the loader runs alongside the game
+    sfx_hack = load_sfx(SFX_HACK_FILE, 0.6)  # hack confirm
+    sfx_binary = load_sfx(SFX_BINARY_FILE, 0.5)  # binary toggle
+    sfx_error = load_sfx(SFX_ERROR_FILE, 0.25)  # critical error
+
 
-    # Binary toggle SFX
+def load_sfx(path, volume):
+    """A Sound at the given volume, or None if it can't be loaded."""
     try:
-        sfx_binary = pygame.mixer.Sound(SFX_BINARY_FILE)
-        sfx_binary.set_volume(0.5)
+        sound = pygame.mixer.Sound(path)
     except Exception:
-        sfx_binary = None
+        return None
+    sound.set_volume(volume)
+    return sound
+
+
+def load_audio():
+    """Decode the music and SFX (runs on the audio loader thread)."""
+    init_audio()
+    startup_mark("audio loaded")
+
 
-    # Critical error SFX
+def start_audio_loading():
+    """
+    Open the mixer, then decode audio in the background so the boot screen
+    does not wait for it. SDL subsystem init is not thread-safe, so the
+    mixer is opened here on the main thread.
+    """
     try:
-        sfx_error = pygame.mixer.Sound(SFX_ERROR_FILE)
-        sfx_error.set_volume(0.25)
-    except Exception:
-        sfx_error = None
+        pygame.mixer.init()
+    except pygame.error:
+        return  # no sound device; the game plays silently
+    threading.Thread(target=load_audio, name="audio-loader", daemon=True).start()
 
 
 # ---- Dynamic screen + fullscreen handling ----
+# These will be initialized in init_display()
 DEFAULT_WINDOW_SIZE = (1300, 600)
-info = pygame.display.Info()
-FULLSCREEN_SIZE = (info.current_w, info.current_h)
-
-# Start in fullscreen
+FULLSCREEN_SIZE = DEFAULT_WINDOW_SIZE
 fullscreen = True
-WIDTH, HEIGHT = FULLSCREEN_SIZE
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+WIDTH, HEIGHT = DEFAULT_WINDOW_SIZE
+screen = None
+headless = False
+
+# The rain scene can be rendered below screen resolution and upscaled; the
+# UI overlay always stays at native resolution. Set up in init_surfaces().
+render_scale = 1.0
+smooth_upscale = False
+SCENE_WIDTH, SCENE_HEIGHT = WIDTH, HEIGHT
+upscaled_surface = None  # screen-sized target of the upscale
 
 hack_input_mode = False
 hack_buffer = ""
@@ -91,16 +427,14 @@ PUZZLE_CHARS_PER_SEC = 40.0  # speed of typewriter (chars per second)
 
 # Last frame delta time in ms for UI effects
 last_dt_ms = 0
+sim_time_ms = 0.0  # sum of frame times, the clock for UI animations
 
-
-pygame.display.set_caption(
-    f"VisionBreaker: Neurogrid Terminal | mode={game_mode}  hack={hack_input_mode}"
-)
-
-# Font Settings
-FONT_SIZE = 28
-font = pygame.font.Font(pygame.font.match_font("monospace"), FONT_SIZE)
-big_font = pygame.font.Font(pygame.font.match_font("monospace"), 48)
+# Font Settings (fonts are loaded in init_fonts())
+BASE_FONT_SIZE = 28  # rain glyph size at render_scale 1.0
+BASE_BANNER_SIZE = 48
+FONT_SIZE = BASE_FONT_SIZE
+font = None
+big_font = None
 
 # Character Pool (English + Katakana)
 char_pool = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@#$%&*カタカナ"
@@ -231,25 +565,54 @@ COLOR_THEMES = [
     },
 ]
 
+# Trail cells fade towards the background as the head moves away from them:
+# "trail" for the newest cells, then "trail1", "trail2", ... each a step
+# dimmer. Every theme gets the faded colors of its own trail.
+TRAIL_FADE_LEVELS = 4
+TRAIL_ROLES = ("trail",) + tuple(f"trail{level}" for level in range(1, TRAIL_FADE_LEVELS))
+
+for theme in COLOR_THEMES:
+    for level, role in enumerate(TRAIL_ROLES):
+        fade = 1.0 - level / TRAIL_FADE_LEVELS
+        theme[role] = tuple(round(b + (t - b) * fade) for b, t in zip(theme["bg"], theme["trail"]))
+
 theme_index = 0
 current_theme = COLOR_THEMES[theme_index]
 unlocked_themes = 1
 
 
 # These will be initialized in init_surfaces()
+# Column state lives in parallel NumPy arrays (one entry per rain column)
 columns = 0
-raindrops = []
-x_positions = []
-speeds = []
+raindrops = np.zeros(0)                   # head row of each drop (in cells)
+x_positions = np.zeros(0, dtype=np.int32)  # pixel x of each column
+speeds = np.zeros(0)                      # cells per frame at 1.0x speed
+
+# Detail knobs, set from QUALITY_LEVELS by set_quality_knobs()
 trail_length = 10
-trail_surface = None
+column_density = 2         # rain columns per FONT_SIZE of width
+effect_chance_scale = 1.0  # multiplier on head glitch / flash chances
+max_word_rains = 8         # ambient word rains on screen at once
+glitch_line_count = 8      # critical error glitch lines per frame
 scene_surface = None
+
+# Critical error overlay pieces, built with the surfaces / glyph atlas: the
+# pre-filled red tint layer, the SYSTEM FAILURE banner and a bank of glitch
+# line layouts (each a list of rects) that the event cycles through
+GLITCH_LAYOUT_BANK = 24
 error_overlay = None
+failure_banner = None
+glitch_layouts = []
 
-# Camera shake
+# Camera shake (timer counts SIM_FPS frames)
 shake_intensity = 0
 shake_timer = 0
 
+# SIM_FPS frames that elapsed during the current frame (1.0 when running
+# exactly at SIM_FPS); every per-frame rate is scaled by it
+frame_step = 1.0
+MAX_FRAME_STEP = 3.0  # longer hitches slow the simulation instead of jumping
+
 # Global speed multiplier
 base_speed_factor = 0.5
 slow_mo = False  # bullet-time toggle
@@ -314,14 +677,25 @@ running = True
 paused = False
 clock = pygame.time.Clock()
 
-# Smaller control overlay font so it does not crowd the screen
-ui_font = pygame.font.SysFont("consolas", 12)
-hack_font = pygame.font.SysFont("consolas", 14)
-puzzle_font = pygame.font.SysFont("consolas", 13)
+# Smaller control overlay fonts so they do not crowd the screen
+ui_font = None
+hack_font = None
+puzzle_font = None
+
+# Special vertical word rain effects, kept in a fixed pool of slots (parallel
+# NumPy arrays like the rain columns). A spawn takes a free slot, or recycles
+# the oldest word when every slot is busy, so nothing is allocated per frame.
+WORD_RAIN_CAPACITY = 64
+WORD_MAX_CHARS = 64      # longer text is cut; it would run off screen anyway
+WORD_FLASH_CHANCE = 0.1  # per letter per frame, before effect_chance_scale
 
-# Special vertical word rain effects
-# list of dicts: {"x", "y", "letters", "speed"}
-word_rains = []
+word_rain_active = np.zeros(WORD_RAIN_CAPACITY, dtype=bool)
+word_rain_x = np.zeros(WORD_RAIN_CAPACITY, dtype=np.int32)
+word_rain_y = np.zeros(WORD_RAIN_CAPACITY)       # pixel y of the first letter
+word_rain_speed = np.zeros(WORD_RAIN_CAPACITY)   # pixels per frame at 1.0x speed
+word_rain_order = np.zeros(WORD_RAIN_CAPACITY, dtype=np.int64)  # spawn sequence number
+word_rain_text = [""] * WORD_RAIN_CAPACITY
+word_rain_spawned = 0
 
 
 # Critical error state
@@ -329,23 +703,855 @@ critical_error_timer = 0
 critical_glitch_intensity = 0
 
 
+def init_display(offscreen=False, resolution=None, load_fonts=True):
+    """
+    Start pygame and open the main window. With offscreen=True the SDL dummy
+    drivers are used so no display, GPU or sound card is needed. Pass
+    load_fonts=False to show the window before the fonts are resolved and
+    call init_fonts() later.
+    """
+    global FULLSCREEN_SIZE, fullscreen, WIDTH, HEIGHT, screen, headless
+
+    headless = offscreen
+    if headless:
+        # Must be set before SDL initializes its video/audio subsystems
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    # Only what the window needs; the mixer is opened by the audio loader
+    pygame.display.init()
+    pygame.font.init()
+
+    if headless:
+        fullscreen = False
+        FULLSCREEN_SIZE = resolution or DEFAULT_WINDOW_SIZE
+        WIDTH, HEIGHT = FULLSCREEN_SIZE
+    else:
+        info = pygame.display.Info()
+        FULLSCREEN_SIZE = (info.current_w, info.current_h)
+        if resolution:
+            # An explicit size starts windowed
+            fullscreen = False
+            WIDTH, HEIGHT = resolution
+        else:
+            # Start in fullscreen
+            fullscreen = True
+            WIDTH, HEIGHT = FULLSCREEN_SIZE
+    screen = set_display_mode()
+
+    set_caption(f"VisionBreaker: Neurogrid Terminal | mode={game_mode}  hack={hack_input_mode}")
+    if load_fonts:
+        init_fonts()
+
+
+def set_display_mode():
+    """(Re)open the display at WIDTH x HEIGHT honoring fullscreen and --vsync."""
+    if renderer_backend == "sdl2":
+        return open_renderer_window()
+    # The dummy driver has no fullscreen; a plain window of that size will do
+    flags = pygame.FULLSCREEN if fullscreen and not headless else 0
+    if config.vsync and not headless:
+        # SDL only offers vsync through the SCALED or OPENGL paths
+        try:
+            return pygame.display.set_mode((WIDTH, HEIGHT), flags | pygame.SCALED, vsync=1)
+        except pygame.error:
+            pass
+    return pygame.display.set_mode((WIDTH, HEIGHT), flags)
+
+
+def set_caption(text):
+    """Set the window title (of the renderer's window with --renderer sdl2)."""
+    if sdl_window is not None:
+        sdl_window.title = text
+    else:
+        pygame.display.set_caption(text)
+
+
+def flip_display():
+    """Show screen as drawn; with --renderer sdl2 it is uploaded and presented."""
+    if sdl_renderer is None:
+        pygame.display.flip()
+        return
+    ui_texture.update(screen)
+    sdl_renderer.clear()
+    ui_texture.draw()
+    sdl_renderer.present()
+
+
+# ==== FONT RESOLUTION ====
+# Finding a font file by name scans the system fonts (fc-list on Linux, the
+# registry on Windows), which can take seconds on a slow disk. The paths are
+# resolved once on a background thread and cached on disk for later runs.
+FONT_NAMES = ("monospace", "consolas")
+CACHE_DIR = os.environ.get("VISIONBREAKER_CACHE_DIR") or os.path.join(
+    os.environ.get("LOCALAPPDATA")
+    or os.environ.get("XDG_CACHE_HOME")
+    or os.path.join(os.path.expanduser("~"), ".cache"),
+    "visionbreaker",
+)
+FONT_CACHE_FILE = os.path.join(CACHE_DIR, "font_paths.json")
+
+font_paths = {}  # name -> font file, None for pygame's default font
+font_paths_ready = threading.Event()
+font_resolver = None
+
+
+def load_font_cache():
+    """Font paths saved by an earlier run, or None if missing or out of date."""
+    try:
+        with open(FONT_CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or set(cached) != set(FONT_NAMES):
+        return None
+    for path in cached.values():
+        if path is not None and not os.path.isfile(path):
+            return None  # a font was removed or moved
+    return cached
+
+
+def save_font_cache(paths):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(FONT_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(paths, f, indent=2)
+    except OSError:
+        pass  # read-only home; resolve again next run
+
+
+def resolve_font_paths():
+    """Look up FONT_NAMES in the system fonts (runs on the font resolver thread)."""
+    paths = {name: pygame.font.match_font(name) for name in FONT_NAMES}
+    save_font_cache(paths)
+    font_paths.update(paths)
+    font_paths_ready.set()
+    startup_mark("fonts resolved")
+
+
+def start_font_resolution():
+    """Use the cached font paths, or resolve them on a background thread."""
+    global font_resolver
+    if font_paths_ready.is_set() or font_resolver is not None:
+        return
+    cached = load_font_cache()
+    if cached is not None:
+        font_paths.update(cached)
+        font_paths_ready.set()
+        startup_mark("fonts from cache")
+        return
+    font_resolver = threading.Thread(target=resolve_font_paths, name="font-resolver", daemon=True)
+    font_resolver.start()
+
+
+def load_font(name, size):
+    """A font by FONT_NAMES entry; pygame's default font until paths are resolved."""
+    return pygame.font.Font(font_paths.get(name), size)
+
+
+def init_rain_fonts():
+    """Load the fonts drawn into the scene, sized for the render scale."""
+    global font, big_font
+    font = load_font("monospace", FONT_SIZE)
+    big_font = load_font("monospace", max(8, round(BASE_BANNER_SIZE * render_scale)))
+
+
+def init_fonts():
+    """Load the rain, banner and UI fonts, waiting for font resolution if needed."""
+    global font, big_font, ui_font, hack_font, puzzle_font
+
+    start_font_resolution()
+    font_paths_ready.wait()
+
+    # Cached UI text was rendered with the old fonts
+    ui_layers.clear()
+
+    init_rain_fonts()
+
+    ui_font = load_font("consolas", 12)
+    hack_font = load_font("consolas", 14)
+    puzzle_font = load_font("consolas", 13)
+
+
+# ==== GLYPH ATLAS ====
+# Every glyph the rain can draw, pre-rendered once per theme and font size so
+# the frame loop only blits. Keys are (char, role) where role names a color
+# entry of current_theme.
+GLYPH_ROLES = ("main", "trail", "bright", "flash")
+
+# Characters typically seen in word rains (SPECIAL_WORDS, unlock banners,
+# puzzle feedback). Anything else typed into HACK> is rendered on first use.
+WORD_RAIN_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,:;!?'\"-_/+=*#@$%&()[]<>"
+
+glyph_atlas = {}
+glyph_atlas_key = None  # (theme colors, FONT_SIZE) the atlas was built for
+glyph_box = (0, 0)      # largest (width, height) of any atlas glyph
+
+# Glyphs outside the prebuilt set (hack console or feed text) are added on
+# first use; only the most recent GLYPH_EXTRA_LIMIT of them are kept so an
+# endless feed of unusual characters can't grow the atlas forever
+GLYPH_EXTRA_LIMIT = 256
+glyph_extras = deque()
+
+# Word rain text -> (bright, flash) strips of its letters, built from the atlas
+WORD_STRIP_CACHE_SIZE = 128
+word_strips = {}
+
+
+def refresh_glyph_atlas():
+    """Re-render the glyph atlas if the theme colors or font size changed."""
+    global glyph_atlas, glyph_atlas_key, glyph_box
+    # Indexed glyphs don't depend on the theme colors
+    colors = None if palette_mode else tuple(current_theme[role] for role in GLYPH_ROLES)
+    key = (colors, FONT_SIZE)
+    if key == glyph_atlas_key:
+        return
+
+    glyph_atlas = {}
+    glyph_extras.clear()
+    for ch in set(char_pool + "01" + WORD_RAIN_ALPHABET):
+        for role in GLYPH_ROLES:
+            glyph_atlas[(ch, role)] = render_glyph(font, ch, role)
+    glyph_atlas_key = key
+    render_failure_banner()
+    glyph_box = (
+        max(glyph.get_width() for glyph in glyph_atlas.values()),
+        max(glyph.get_height() for glyph in glyph_atlas.values()),
+    )
+
+    # New colors (and background) everywhere on screen
+    request_full_present()
+
+    # Trail strips hold glyphs in the old trail color
+    build_trail_cells()
+    redraw_trail_strips()
+    word_strips.clear()
+
+
+def render_glyph(text_font, text, role):
+    """Render text in a theme role, as an indexed surface in palette mode."""
+    if palette_mode:
+        return render_indexed_text(text_font, text, role)
+    return display_format(text_font.render(text, True, current_theme[role]))
+
+
+def display_format(surface, alpha=True):
+    """
+    surface converted to the display's pixel format (keeping per-pixel alpha
+    unless alpha=False), so blitting it never converts pixels on the fly.
+    Every cached or long-lived RGB surface goes through here.
+    """
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha() if alpha else surface.convert()
+    if memory_tracking:
+        track_surface(surface)
+    return surface
+
+
+def copy_surface(surface):
+    """A copy of surface, counted like display_format()'s surfaces."""
+    surface = surface.copy()
+    if memory_tracking:
+        track_surface(surface)
+    return surface
+
+
+def get_glyph(ch, role):
+    """Return the pre-rendered glyph for ch in the given theme role."""
+    glyph = glyph_atlas.get((ch, role))
+    if glyph is None:
+        # Hack console text can contain anything; cache it on first use
+        glyph = render_glyph(font, ch, role)
+        glyph_atlas[(ch, role)] = glyph
+        glyph_extras.append((ch, role))
+        if len(glyph_extras) > GLYPH_EXTRA_LIMIT:
+            del glyph_atlas[glyph_extras.popleft()]
+    return glyph
+
+
+# ==== PALETTE MODE ====
+# With --palette the scene is drawn in 8-bit indexed color. Indices stand
+# for roles rather than colors: the background, an alert red, and
+# PALETTE_AA_LEVELS antialiasing steps of every glyph role (plus "banner",
+# the flash color left out of the critical error tint). All indexed
+# surfaces share INDEX_PALETTE, so blits between them copy indices as-is.
+# Only scene_view (a second view of scene_surface's pixels) and the upscale
+# target carry the real colors, so a theme change, cross-fade or the
+# critical error tint is a set_palette() call and nothing is redrawn.
+PALETTE_BG = 0
+PALETTE_ALERT = 1
+PALETTE_AA_LEVELS = 8
+PALETTE_ROLES = GLYPH_ROLES + TRAIL_ROLES[1:] + ("banner",)
+PALETTE_ROLE_BASE = {role: 2 + i * PALETTE_AA_LEVELS for i, role in enumerate(PALETTE_ROLES)}
+INDEX_PALETTE = [(i, i, i) for i in range(256)]
+ALERT_COLOR = (255, 0, 0)
+CRITICAL_TINT = 80 / 255  # strength of the critical error red overlay
+THEME_FADE_FRAMES = 15    # SIM_FPS frames a theme change cross-fades over
+
+palette_mode = False
+scene_view = None          # scene_surface with the theme palette (palette mode)
+scene_palette_key = None   # state the view palettes were last set from
+scene_bg_color = (0, 0, 0)  # background color of the last palette set
+theme_fade_from = None     # palette colors a cross-fade started from
+theme_fade = 1.0           # cross-fade progress, 1.0 when settled
+
+
+def make_scene_layer(size, transparent=False):
+    """A surface in the scene's pixel format: 8-bit indexed in palette mode."""
+    if not palette_mode:
+        return display_format(pygame.Surface(size, pygame.SRCALPHA if transparent else 0), transparent)
+    layer = pygame.Surface(size, 0, 8)
+    if memory_tracking:
+        track_surface(layer)
+    layer.set_palette(INDEX_PALETTE)
+    if transparent:
+        layer.set_colorkey(PALETTE_BG)
+    return layer
+
+
+def render_indexed_text(text_font, text, role):
+    """
+    Render text as role indices, its antialiasing quantized to
+    PALETTE_AA_LEVELS steps; background pixels are transparent.
+    """
+    coverage = pygame.surfarray.array_alpha(text_font.render(text, True, (255, 255, 255)))
+    levels = (coverage.astype(np.int32) * PALETTE_AA_LEVELS + 127) // 255
+    indices = np.where(levels > 0, PALETTE_ROLE_BASE[role] + levels - 1, PALETTE_BG)
+    glyph = make_scene_layer(coverage.shape, transparent=True)
+    pygame.surfarray.blit_array(glyph, indices.astype(np.uint8))
+    return glyph
+
+
+def theme_palette(theme):
+    """256 x 3 array of the colors every palette index stands for in theme."""
+    bg = np.array(theme["bg"], dtype=float)
+    colors = np.zeros((256, 3))
+    colors[PALETTE_BG] = bg
+    colors[PALETTE_ALERT] = ALERT_COLOR
+    steps = np.arange(1, PALETTE_AA_LEVELS + 1)[:, None] / PALETTE_AA_LEVELS
+    for role, base in PALETTE_ROLE_BASE.items():
+        color = np.array(theme["flash" if role == "banner" else role])
+        colors[base:base + PALETTE_AA_LEVELS] = bg + (color - bg) * steps
+    return colors
+
+
+def blended_palette():
+    """Current theme palette, part way through a cross-fade if one is running."""
+    colors = theme_palette(current_theme)
+    if theme_fade < 1.0:
+        colors = theme_fade_from + (colors - theme_fade_from) * theme_fade
+    return colors
+
+
+def set_theme(index):
+    """Switch to COLOR_THEMES[index]; in palette mode the colors cross-fade."""
+    global theme_index, current_theme, theme_fade_from, theme_fade
+    if palette_mode:
+        theme_fade_from = blended_palette()
+        theme_fade = 0.0
+    theme_index = index
+    current_theme = COLOR_THEMES[index]
+    refresh_glyph_atlas()
+    request_full_present()
+
+
+def advance_theme_fade():
+    """Move a running cross-fade on by this frame's frame_step."""
+    global theme_fade
+    if theme_fade < 1.0:
+        theme_fade = min(1.0, theme_fade + frame_step / THEME_FADE_FRAMES)
+
+
+def update_scene_palette():
+    """Give scene_view and the upscale target this frame's colors; True if they changed."""
+    global scene_palette_key, scene_bg_color
+    key = (theme_index, theme_fade, critical_overlay_drawn)
+    if key == scene_palette_key:
+        return False
+
+    colors = blended_palette()
+    if critical_overlay_drawn:
+        # The SYSTEM FAILURE banner is drawn over the tint, not under it
+        banner = slice(PALETTE_ROLE_BASE["banner"], PALETTE_ROLE_BASE["banner"] + PALETTE_AA_LEVELS)
+        untinted = colors[banner].copy()
+        colors += (np.array(ALERT_COLOR) - colors) * CRITICAL_TINT
+        colors[banner] = untinted
+    palette = [tuple(color) for color in np.rint(colors).astype(int).tolist()]
+    scene_view.set_palette(palette)
+    if upscaled_surface is not None:
+        upscaled_surface.set_palette(palette)
+    scene_bg_color = palette[PALETTE_BG]
+    scene_palette_key = key
+    return True
+
+
+def scene_image():
+    """The scene as it appears on screen, e.g. for screenshots."""
+    if sdl_renderer is not None:
+        return read_back_rendered_scene()
+    if palette_mode:
+        update_scene_palette()
+        return scene_view
+    return scene_surface
+
+
+# ==== RANDOM STREAMS ====
+# Every subsystem draws from its own generator, so a seeded run is
+# reproducible and one subsystem drawing more (a new effect, another
+# quality level) doesn't shift the randomness of the others. Batched
+# subsystems use NumPy generators, scalar ones random.Random.
+rain_rng = np.random.default_rng()   # rain columns
+trail_rng = np.random.default_rng()  # trail glyphs and mutations
+word_rng = np.random.default_rng()   # word rain spawns and flashes
+shake_rng = random.Random()          # camera shake triggers and offsets
+glitch_rng = random.Random()         # critical error glitch lines
+ui_rng = random.Random()             # puzzle line glitch (only drawn when presenting)
+
+
+def seed_random(seed):
+    """Seed every random stream from one seed; None reseeds from the OS."""
+    global rain_rng, trail_rng, word_rng, shake_rng, glitch_rng, ui_rng
+    rain_seq, trail_seq, word_seq, shake_seq, glitch_seq, ui_seq = np.random.SeedSequence(seed).spawn(6)
+    rain_rng = np.random.default_rng(rain_seq)
+    trail_rng = np.random.default_rng(trail_seq)
+    word_rng = np.random.default_rng(word_seq)
+    shake_rng = random.Random(int(shake_seq.generate_state(1)[0]))
+    glitch_rng = random.Random(int(glitch_seq.generate_state(1)[0]))
+    ui_rng = random.Random(int(ui_seq.generate_state(1)[0]))
+
+
+# ==== RAIN COLUMN ENGINE ====
+# Per-frame randomness for every column comes from one batched draw.
+
+# Columns of the per-frame roll matrix
+ROLL_GLITCH = 0   # flash / binary glitch
+ROLL_COLOR = 1    # bright head
+ROLL_SHAKE = 2    # random camera shake
+ROLL_RESET = 3    # re-seed a drop that left the screen
+ROLL_BIT = 4      # which digit a binary glitch shows
+ROLL_COUNT = 5
+
+HEAD_FLASH_CHANCE = 0.015   # per head per frame, before effect_chance_scale
+HEAD_GLITCH_CHANCE = 0.05   # includes the flash chance
+
+# Head roles, indexed by the codes step_rain_columns() returns
+HEAD_ROLES = ("main", "bright", "flash")
+
+# Glyphs are handled as indexes into char_pool
+POOL_CODES = np.arange(len(char_pool))
+BINARY_CODES = np.array([char_pool.index("0"), char_pool.index("1")])
+
+
+def chance_threshold(chance):
+    """
+    Roll threshold for an event with the given chance per SIM_FPS frame,
+    adjusted for frame_step: the event fires when random() > threshold.
+    """
+    return (1.0 - chance) ** frame_step
+
+
+def step_rain_columns(effective_speed):
+    """
+    Roll this frame's glyphs and effects for every column, advance all drops
+    by effective_speed cells per SIM_FPS frame and re-seed the ones that left
+    the screen.
+
+    Returns (ys, rows, codes, chars, roles) describing the frame to draw,
+    taken before the drops moved: pixel y and cell row of each head, and the
+    head glyph as a char_pool index and as a character.
+    """
+    global raindrops, speeds
+
+    rolls = rain_rng.random((columns, ROLL_COUNT))
+    ys = (raindrops * FONT_SIZE).astype(np.int32)
+    rows = np.floor(raindrops).astype(np.int64)
+
+    # Random glyph per head
+    pool_codes = BINARY_CODES if binary_mode else POOL_CODES
+    codes = pool_codes[rain_rng.integers(len(pool_codes), size=columns)]
+
+    # Glitch / bright effects
+    r = rolls[:, ROLL_GLITCH]
+    flash = r > 1.0 - HEAD_FLASH_CHANCE * effect_chance_scale
+    glitch = (r > 1.0 - HEAD_GLITCH_CHANCE * effect_chance_scale) & ~flash & (not binary_mode)
+    bright = glitch | (~flash & (rolls[:, ROLL_COLOR] > 0.95))
+    role_codes = np.where(flash, 2, np.where(bright, 1, 0))
+    codes[glitch] = BINARY_CODES[(rolls[glitch, ROLL_BIT] > 0.5).astype(np.int64)]
+
+    # Move drops
+    raindrops += speeds * (effective_speed * frame_step)
+
+    # Random shake trigger
+    if (rolls[:, ROLL_SHAKE] > chance_threshold(0.003)).any():
+        trigger_shake(
+            intensity=shake_rng.randint(1, 3),
+            duration=shake_rng.randint(10, 25),
+        )
+
+    # Reset drops randomly after leaving screen
+    reset = (ys > SCENE_HEIGHT) & (rolls[:, ROLL_RESET] > chance_threshold(0.1))
+    count = int(np.count_nonzero(reset))
+    if count:
+        raindrops[reset] = rain_rng.integers(-10, 1, size=count)
+        speeds[reset] = rain_rng.uniform(0.4, 1.2, size=count)
+
+    chars = [char_pool[c] for c in codes.tolist()]
+    roles = [HEAD_ROLES[c] for c in role_codes.tolist()]
+    return ys.tolist(), rows, codes, chars, roles
+
+
+# ==== RAIN CELL GRID ====
+# Trails live in a grid of cells fixed in scene space, columns x grid_rows:
+# grid_codes holds each cell's glyph (a char_pool index) and grid_timers the
+# SIM_FPS frames left until that glyph mutates. A column's trail is the
+# trail_length cells ending at its head's row (trail_rows), so a cell's age
+# is how many rows the head has moved past it, and it fades out once that
+# reaches trail_length. grid_levels is the intensity plane: the fade level
+# (an index into TRAIL_ROLES) each cell was last drawn at, which drops a step
+# every trail_length / TRAIL_FADE_LEVELS rows of age. A cell is only redrawn
+# when the head enters it, its timer runs out or its fade level changes.
+# Each column draws its cells into a ring strip of trail_length cells, grid
+# row r in slot r % trail_length, so strips never scroll; a trail is blitted
+# from its strip in at most two pieces.
+TRAIL_MUTATION_CHANCE = 0.03  # per cell per SIM_FPS frame
+# Mean of the exponential mutation timers that give the same chance per frame
+TRAIL_MUTATION_MEAN = -1.0 / math.log(1.0 - TRAIL_MUTATION_CHANCE)
+
+grid_rows = 0
+grid_codes = np.zeros((0, 0), dtype=np.int64)
+grid_timers = np.zeros((0, 0))
+grid_levels = np.zeros((0, 0), dtype=np.int8)
+trail_cells = []   # fade level -> char_pool index -> trail-colored cell surface
+trail_strips = []  # per column ring strip of trail_length cells
+trail_rows = np.zeros(0, dtype=np.int64)  # head row each column's trail ends at
+
+
+def reset_trails():
+    """Create a fresh grid and trail strips for the current columns and trail_length."""
+    global trail_strips
+
+    strip_size = (FONT_SIZE, trail_length * FONT_SIZE)
+    trail_strips = [make_scene_layer(strip_size, transparent=True) for _ in range(columns)]
+    reset_trail_grid()
+    redraw_trail_strips()
+
+
+def reset_trail_grid():
+    """Fill a fresh grid with random glyphs and timers; trails start at the current heads."""
+    global grid_rows, grid_codes, grid_timers, grid_levels, trail_rows
+    grid_rows = SCENE_HEIGHT // FONT_SIZE + 1
+    grid_codes = trail_rng.integers(len(char_pool), size=(columns, grid_rows))
+    grid_timers = mutation_timers((columns, grid_rows))
+    grid_levels = np.full((columns, grid_rows), -1, dtype=np.int8)
+    trail_rows = np.floor(raindrops).astype(np.int64)
+
+
+def mutation_timers(size):
+    """Fresh mutation timers, in SIM_FPS frames."""
+    return trail_rng.exponential(TRAIL_MUTATION_MEAN, size=size)
+
+
+def trail_levels(ages):
+    """Fade level of trail cells the head has moved ages rows past."""
+    return ages * TRAIL_FADE_LEVELS // trail_length
+
+
+def build_trail_cells():
+    """
+    Pre-render one FONT_SIZE square cell per char_pool glyph in each trail
+    fade level's color. Blending is disabled on the cells so blitting one
+    replaces a strip cell outright, with no separate clear.
+    """
+    global trail_cells
+    trail_cells = []
+    for role in TRAIL_ROLES:
+        cells = []
+        for ch in char_pool:
+            cell = make_scene_layer((FONT_SIZE, FONT_SIZE), transparent=True)
+            # Clip to the cell so tall glyphs don't bleed into the next one
+            cell.blit(render_glyph(font, ch, role), (0, 0))
+            if palette_mode:
+                cell.set_colorkey(None)
+            else:
+                cell.set_alpha(None)
+            cells.append(cell)
+        trail_cells.append(cells)
+
+
+def trail_window(rows):
+    """
+    Grid rows of every trail cell, head cell first, for heads at rows, and
+    which of them are on the grid.
+    """
+    window = rows[:, None] - np.arange(trail_length)[None, :]
+    return window, (window >= 0) & (window < grid_rows)
+
+
+def trail_cell_blits(rows, codes, levels):
+    """(cell, dest) pairs drawing the given grid rows of one column into its ring strip."""
+    return [
+        (trail_cells[level][code], (0, (row % trail_length) * FONT_SIZE))
+        for row, code, level in zip(rows, codes, levels)
+    ]
+
+
+def draw_grid_cells(cols, rows):
+    """Redraw the given grid cells (cols sorted ascending) into their trail strips."""
+    if not len(cols):
+        return
+    codes = grid_codes[cols, rows]
+    levels = grid_levels[cols, rows]
+    starts = np.flatnonzero(np.diff(cols, prepend=-1))
+    ends = np.append(starts[1:], len(cols))
+    for col, a, b in zip(cols[starts].tolist(), starts.tolist(), ends.tolist()):
+        trail_strips[col].blits(
+            trail_cell_blits(rows[a:b].tolist(), codes[a:b].tolist(), levels[a:b].tolist()),
+            doreturn=False,
+        )
+
+
+def redraw_trail_strips():
+    """Re-render every trail strip from the grid (e.g. after a theme change)."""
+    window, on_grid = trail_window(trail_rows)
+    cols, cells = np.nonzero(on_grid)
+    grid_levels[cols, window[cols, cells]] = trail_levels(cells)
+    draw_grid_cells(cols, window[cols, cells])
+
+
+def update_trails(rows, head_codes):
+    """Advance the trail grid and redraw just the cells that changed."""
+    draw_grid_cells(*advance_trail_grid(rows, head_codes))
+
+
+def advance_trail_grid(rows, head_codes):
+    """
+    Move every trail to end at its head's new row: write the cells the heads
+    entered, tick the mutation timers of the trail cells and mutate the ones
+    that ran out, and fade the cells the heads moved away from. Returns the
+    (cols, rows) of the changed cells, sorted by column.
+    """
+    global trail_rows
+
+    # Rows each head entered; a reset drop (or one that moved a whole trail
+    # length) gets an entirely new trail
+    shift = rows - trail_rows
+    shift = np.where((shift < 0) | (shift > trail_length), trail_length, shift)
+    window, on_grid = trail_window(rows)
+    cols, cells = np.nonzero(on_grid)
+    grid_r = window[cols, cells]
+
+    exposed = cells < shift[cols]
+    timers = grid_timers[cols, grid_r] - frame_step
+    mutated = (timers <= 0) & ~exposed
+    written = exposed | mutated
+
+    # Entered cells repeat the head glyph, or half the time get a random one
+    # (binary trails always repeat the head); mutations are random
+    pool_codes = BINARY_CODES if binary_mode else POOL_CODES
+    new_codes = pool_codes[trail_rng.integers(len(pool_codes), size=int(written.sum()))]
+    entered = exposed[written]
+    keep_head = entered if binary_mode else entered & (trail_rng.random(len(entered)) <= 0.5)
+    new_codes[keep_head] = head_codes[cols[written][keep_head]]
+
+    timers[written] = mutation_timers(len(new_codes))
+    grid_timers[cols, grid_r] = timers
+    grid_codes[cols[written], grid_r[written]] = new_codes
+
+    # Cells the heads moved far enough away from drop a fade level
+    levels = trail_levels(cells)
+    changed = written | (grid_levels[cols, grid_r] != levels)
+    grid_levels[cols, grid_r] = levels
+    trail_rows = rows
+    return cols[changed], grid_r[changed]
+
+
+def visible_trails(indices):
+    """The columns among indices whose trail strip is on screen, and its top y."""
+    tops = (trail_rows[indices] - (trail_length - 1)) * FONT_SIZE
+    on_screen = (tops + trail_length * FONT_SIZE > 0) & (tops < SCENE_HEIGHT)
+    return indices[on_screen], tops[on_screen]
+
+
+def trail_blits(indices, x0=0, borrowed=None):
+    """
+    (strip, dest, area) blits drawing the visible trails of the columns in
+    indices, x relative to x0: the ring strip from the top cell's slot down,
+    then its start for the cells that wrapped around.
+    """
+    strip_h = trail_length * FONT_SIZE
+    blits = []
+    visible, tops = visible_trails(indices)
+    for i, x, top in zip(visible.tolist(), (x_positions[visible] - x0).tolist(), tops.tolist()):
+        strip = trail_strips[i] if borrowed is None else borrowed.get(i, trail_strips[i])
+        split = (top // FONT_SIZE) % trail_length * FONT_SIZE
+        blits.append((strip, (x, top), (0, split, FONT_SIZE, strip_h - split)))
+        if split:
+            blits.append((strip, (x, top + strip_h - split), (0, 0, FONT_SIZE, split)))
+    return blits
+
+
+def draw_trails(surface):
+    """Blit the visible trails; trails off screen are culled, SDL clips the rest."""
+    surface.blits(trail_blits(np.arange(columns)), doreturn=False)
+
+
+# ==== STRIP RENDERING ====
+# With --render-threads N the scene is split into N vertical strips, each
+# drawn by a pool worker into its own subsurface of scene_surface. A column
+# is drawn by every strip its glyphs overlap, clipped to that strip, so the
+# result is pixel-identical to drawing serially; all random rolls stay on the
+# main thread, so it doesn't depend on the worker count either.
+# SDL caches blit state on the source surface, so workers never share one:
+# each strip has its own copy of the head glyphs, and the trail strips of
+# columns that reach over a boundary are copied for the neighbouring strip.
+render_threads = 1
+render_processes = 0    # --render-processes; see PROCESS COMPOSITOR
+render_pool = None
+render_strips = []      # (x0, x1, subsurface of scene_surface)
+strip_atlases = []      # per render strip: (char, role) -> its own head glyph
+strip_atlas_key = None  # glyph_atlas_key the strip atlases were copied from
+
+
+def start_render_pool():
+    """Start the strip worker pool if more than one render thread is wanted."""
+    global render_pool
+    if render_threads > 1 and render_pool is None:
+        render_pool = ThreadPoolExecutor(
+            max_workers=render_threads, thread_name_prefix="rain-strip"
+        )
+
+
+def stop_render_pool():
+    """Shut the strip worker pool down."""
+    global render_pool
+    if render_pool is not None:
+        render_pool.shutdown()
+        render_pool = None
+
+
+def build_render_strips():
+    """Split scene_surface into render_threads vertical strips."""
+    global render_strips, strip_atlas_key
+    count = max(1, min(render_threads, SCENE_WIDTH // FONT_SIZE))
+    bounds = [SCENE_WIDTH * k // count for k in range(count + 1)]
+    render_strips = [
+        (x0, x1, scene_surface.subsurface((x0, 0, x1 - x0, SCENE_HEIGHT)))
+        for x0, x1 in zip(bounds, bounds[1:])
+    ]
+    strip_atlas_key = None
+
+
+def build_strip_atlases():
+    """Give every render strip its own copy of the head glyphs."""
+    global strip_atlases, strip_atlas_key
+    keys = [(ch, role) for ch in set(char_pool + "01") for role in HEAD_ROLES]
+    strip_atlases = [
+        {key: copy_surface(get_glyph(*key)) for key in keys} for _ in render_strips
+    ]
+    strip_atlas_key = glyph_atlas_key
+
+
+def draw_rain_strip(strip, atlas, indices, borrowed, ys, chars, roles):
+    """Draw the trails and heads of the given columns into one render strip."""
+    x0, _, surface = strip
+    surface.blits(trail_blits(indices, x0, borrowed), doreturn=False)
+    surface.blits(
+        [
+            (atlas[(chars[i], roles[i])], (x - x0, ys[i]))
+            for i, x in zip(indices.tolist(), x_positions[indices].tolist())
+        ],
+        doreturn=False,
+    )
+
+
+def draw_rain_threaded(ys, chars, roles):
+    """Draw trails and heads strip by strip on the pool; returns once all are done."""
+    if strip_atlas_key != glyph_atlas_key:
+        build_strip_atlases()
+
+    width = max(FONT_SIZE, glyph_box[0])
+    jobs = []
+    for x0, x1, _ in render_strips:
+        indices = np.flatnonzero((x_positions + width > x0) & (x_positions < x1))
+        # Copy every borrowed strip before any worker starts blitting
+        borrowed = {i: copy_surface(trail_strips[i]) for i in indices[x_positions[indices] < x0].tolist()}
+        jobs.append((indices, borrowed))
+
+    futures = [
+        render_pool.submit(draw_rain_strip, strip, atlas, indices, borrowed, ys, chars, roles)
+        for strip, atlas, (indices, borrowed) in zip(render_strips, strip_atlases, jobs)
+    ]
+    for future in futures:
+        future.result()
+
+
 def init_surfaces():
     """Initialize / rebuild surfaces and rain columns when screen size changes."""
-    global trail_surface, scene_surface, error_overlay
-    global columns, raindrops, x_positions, speeds, word_rains
+    global scene_surface, error_overlay, upscaled_surface, scene_view, scene_palette_key
+    global SCENE_WIDTH, SCENE_HEIGHT, FONT_SIZE
+
+    # Scene resolution and glyph size follow the render scale
+    SCENE_WIDTH = max(1, round(WIDTH * render_scale))
+    SCENE_HEIGHT = max(1, round(HEIGHT * render_scale))
+    font_size = max(8, round(BASE_FONT_SIZE * render_scale))
+    if font_size != FONT_SIZE or font is None:
+        FONT_SIZE = font_size
+        init_rain_fonts()
+
+    scene_surface = make_scene_layer((SCENE_WIDTH, SCENE_HEIGHT))
+    if (SCENE_WIDTH, SCENE_HEIGHT) != (WIDTH, HEIGHT):
+        upscaled_surface = make_scene_layer((WIDTH, HEIGHT))
+    else:
+        upscaled_surface = None
+    if palette_mode:
+        scene_view = scene_surface.subsurface(scene_surface.get_rect())
+        scene_palette_key = None
+    else:
+        scene_view = scene_surface
 
-    trail_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    scene_surface = pygame.Surface((WIDTH, HEIGHT))
-    error_overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    build_render_strips()
 
     # Rebuild rain columns to fill the new resolution
-    columns = (WIDTH // FONT_SIZE) * 2
-    raindrops = [random.randint(-HEIGHT // FONT_SIZE, 0) for _ in range(columns)]
-    x_positions = [i * (FONT_SIZE // 2) for i in range(columns)]
-    speeds = [random.uniform(0.4, 1.2) for _ in range(columns)]
+    build_rain_columns()
 
     # Clear word rains when resizing so they do not get weird positions
-    word_rains.clear()
+    clear_word_rains()
+
+    refresh_glyph_atlas()
+    build_critical_overlay()
+    reset_trails()
+    if render_processes:
+        start_compositor()
+    if sdl_renderer is not None:
+        init_renderer_scene()
+    request_full_present()
+    reset_quality_governor()
+
+
+def build_rain_columns(carry_over=False):
+    """
+    Lay out column_density columns per FONT_SIZE across the scene. With
+    carry_over, each new column continues the drop of the nearest old column
+    (quality changes), so the rain doesn't restart from the top.
+    """
+    global columns, raindrops, x_positions, speeds
+
+    new_columns = int((SCENE_WIDTH // FONT_SIZE) * column_density)
+    new_x = (np.arange(new_columns) * (FONT_SIZE / column_density)).astype(np.int32)
+    new_drops = rain_rng.integers(-SCENE_HEIGHT // FONT_SIZE, 1, size=new_columns).astype(float)
+    new_speeds = rain_rng.uniform(0.4, 1.2, size=new_columns)
+
+    if carry_over and columns:
+        nearest = np.minimum(np.searchsorted(x_positions, new_x), columns - 1)
+        # When columns are added, only the first one per old drop inherits it
+        _, first = np.unique(nearest, return_index=True)
+        new_drops[first] = raindrops[nearest[first]]
+        new_speeds[first] = speeds[nearest[first]]
+
+    columns = new_columns
+    raindrops = new_drops
+    x_positions = new_x
+    speeds = new_speeds
 
 
 def trigger_shake(intensity=3, duration=20):
@@ -359,98 +1565,275 @@ def get_shake_offset():
     """Return current shake offset."""
     global shake_timer
     if shake_timer > 0:
-        shake_timer -= 1
+        shake_timer -= frame_step
         return (
-            random.randint(-shake_intensity, shake_intensity),
-            random.randint(-shake_intensity, shake_intensity),
+            shake_rng.randint(-shake_intensity, shake_intensity),
+            shake_rng.randint(-shake_intensity, shake_intensity),
         )
     return 0, 0
 
 
 def next_theme():
     """Cycle to the next unlocked color theme."""
-    global theme_index, current_theme
     if unlocked_themes <= 0:
         return
-    theme_index = (theme_index + 1) % unlocked_themes
-    current_theme = COLOR_THEMES[theme_index]
+    set_theme((theme_index + 1) % unlocked_themes)
 
 
 def toggle_fullscreen():
-    """Toggle between fullscreen and windowed 800x600."""
+    """Toggle between fullscreen and windowed DEFAULT_WINDOW_SIZE."""
     global fullscreen, screen, WIDTH, HEIGHT
     fullscreen = not fullscreen
     if fullscreen:
         WIDTH, HEIGHT = FULLSCREEN_SIZE
-        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
     else:
         WIDTH, HEIGHT = DEFAULT_WINDOW_SIZE
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    screen = set_display_mode()
     init_surfaces()
 
 
 def spawn_word_rain():
     """Spawn a vertical word cascade in a random column from SPECIAL_WORDS."""
-    word = random.choice(SPECIAL_WORDS)
+    word = SPECIAL_WORDS[word_rng.integers(len(SPECIAL_WORDS))]
     spawn_word_rain_from_text(word)
 
 
 def spawn_word_rain_from_text(text):
     """Spawn a vertical word cascade using the given text."""
-    text = text.strip()
+    global word_rain_spawned
+    text = text.strip().upper()[:WORD_MAX_CHARS]
     if not text:
         return
-    letters = list(text.upper())
-    col_index = random.randrange(len(x_positions))
-    x = x_positions[col_index]
-    start_y = -len(letters) * FONT_SIZE
-    word_rains.append(
-        {
-            "x": x,
-            "y": start_y,
-            "letters": letters,
-            "speed": random.uniform(1.5, 3.0),
-        }
+
+    free = np.flatnonzero(~word_rain_active)
+    slot = int(free[0]) if len(free) else int(np.argmin(word_rain_order))
+    col_index = word_rng.integers(len(x_positions))
+    word_rain_active[slot] = True
+    word_rain_x[slot] = x_positions[col_index]
+    word_rain_y[slot] = -len(text) * FONT_SIZE
+    word_rain_speed[slot] = word_rng.uniform(1.5, 3.0)
+    word_rain_order[slot] = word_rain_spawned
+    word_rain_text[slot] = text
+    word_rain_spawned += 1
+
+
+def word_rain_count():
+    """Number of word rains currently falling."""
+    return int(np.count_nonzero(word_rain_active))
+
+
+def clear_word_rains():
+    """Free every word rain slot."""
+    word_rain_active[:] = False
+
+
+def get_word_strips(text):
+    """Return the (bright, flash) vertical strips for text, rendering them on first use."""
+    strips = word_strips.get(text)
+    if strips is None:
+        if len(word_strips) >= WORD_STRIP_CACHE_SIZE:
+            del word_strips[next(iter(word_strips))]  # oldest entry
+        strips = tuple(render_word_strip(text, role) for role in ("bright", "flash"))
+        word_strips[text] = strips
+    return strips
+
+
+def render_word_strip(text, role):
+    """Stack the atlas glyphs of text top to bottom, FONT_SIZE apart."""
+    size = (glyph_box[0], (len(text) - 1) * FONT_SIZE + glyph_box[1])
+    strip = make_scene_layer(size, transparent=True)
+    # MAX keeps glyph colors exact on the transparent strip
+    flags = 0 if palette_mode else pygame.BLEND_RGBA_MAX
+    strip.blits(
+        [
+            (get_glyph(ch, role), (0, idx * FONT_SIZE), None, flags)
+            for idx, ch in enumerate(text)
+            if ch != " "  # spaces keep their vertical spacing but draw nothing
+        ],
+        doreturn=False,
     )
+    return strip
 
 
 def draw_word_rains(surface, effective_speed):
     """Draw and update special vertical word rains."""
-    to_remove = []
-    for i, wr in enumerate(word_rains):
-        x = wr["x"]
-        y_top = wr["y"]
-        letters = wr["letters"]
-
-        # Draw each letter top to bottom
-        for idx, ch in enumerate(letters):
-            y = y_top + idx * FONT_SIZE
-            if y > HEIGHT:
-                continue
-
-            # skip rendering spaces but keep vertical spacing
-            if ch == " ":
-                continue
-
-            # Make word rains pop: bright or flash color
-            if random.random() > 0.9:
-                color = current_theme["flash"]
-            else:
-                color = current_theme["bright"]
+    word_rain_rects.clear()
+    active = active_word_rains()
+    if not len(active):
+        return
+    flashing = roll_word_flashes(active)
+    blit_word_rains(surface, active, flashing)
+    move_word_rains(active, effective_speed)
 
-            text = font.render(ch, True, color)
-            surface.blit(text, (x, y))
 
-        # Move the whole word rain down
-        wr["y"] += wr["speed"] * effective_speed
+def active_word_rains():
+    """Slots of the falling word rains, oldest first so newer words are drawn on top."""
+    active = np.flatnonzero(word_rain_active)
+    return active[np.argsort(word_rain_order[active])]
 
-        # Remove once it fully moved past bottom
-        if wr["y"] - len(letters) * FONT_SIZE > HEIGHT:
-            to_remove.append(i)
 
-    # Remove in reverse so indices stay valid
-    for i in reversed(to_remove):
-        del word_rains[i]
+def roll_word_flashes(active):
+    """Make word rains pop: the letters of each active word that flash this frame."""
+    flash_chance = WORD_FLASH_CHANCE * effect_chance_scale
+    return [
+        np.flatnonzero(word_rng.random(len(word_rain_text[slot])) < flash_chance).tolist()
+        for slot in active.tolist()
+    ]
+
+
+def blit_word_rains(surface, active, flashing, x0=0):
+    """Draw the active word rains with their flashing letters, x relative to x0."""
+    draws = []
+    word_draws = []  # index in draws of each word's bright strip
+    for slot, x, y, flash_letters in zip(
+        active.tolist(),
+        (word_rain_x[active] - x0).tolist(),
+        word_rain_y[active].tolist(),
+        flashing,
+    ):
+        y = int(y)
+        if x + glyph_box[0] <= 0 or x >= surface.get_width():
+            continue
+        bright, flash = get_word_strips(word_rain_text[slot])
+
+        # Cull the letters above and below the scene
+        top = max(0, -y)
+        bottom = min(bright.get_height(), SCENE_HEIGHT - y)
+        if bottom <= top:
+            continue
+        width = bright.get_width()
+        word_draws.append(len(draws))
+        draws.append((bright, (x, y + top), (0, top, width, bottom - top)))
+
+        for idx in flash_letters:
+            cell_top = max(idx * FONT_SIZE, top)
+            cell_bottom = min((idx + 1) * FONT_SIZE, bottom)
+            if cell_bottom > cell_top:
+                draws.append((flash, (x, y + cell_top), (0, cell_top, width, cell_bottom - cell_top)))
+
+    # One call for every strip, in order, so newer words still land on top
+    drawn = surface.blits(draws, doreturn=dirty_rects_enabled)
+    if dirty_rects_enabled:
+        word_rain_rects.extend(drawn[i] for i in word_draws)
+
+
+def move_word_rains(active, effective_speed):
+    """Move every word down; free the slots of words that left the scene."""
+    word_rain_y[active] += word_rain_speed[active] * (effective_speed * frame_step)
+    word_rain_active[active] = word_rain_y[active] <= SCENE_HEIGHT
+
+
+# ==== TEXT FEED ====
+# A background thread reads lines from a file, stdin or a growing log into a
+# bounded queue; the frame loop drains it at feed_rate lines per second
+# without ever waiting on it. A finite file simply blocks the reader while
+# the queue is full. Streams (stdin, followed logs) can't be held back, so
+# the oldest queued line is dropped to make room, keeping memory flat and
+# the wall showing the freshest lines.
+FEED_POLL_SECONDS = 0.25    # how often a followed file is checked for new lines
+FEED_MAX_BURST = 4          # lines a frame may spawn after a stall
+FEED_SCREEN_FACTOR = 2      # feed stops spawning above this many x max_word_rains
+
+feed_queue = None
+feed_thread = None
+feed_stop = threading.Event()
+feed_rate = FEED_DEFAULT_RATE
+feed_budget = 0.0   # lines the frame loop may spawn now
+feed_dropped = 0    # lines discarded because the queue was full
+
+
+def start_text_feed(source, follow=False, rate=FEED_DEFAULT_RATE, capacity=FEED_DEFAULT_QUEUE):
+    """Start reading lines from source (a path, or '-' for stdin) into word rains."""
+    global feed_queue, feed_thread, feed_rate, feed_budget
+    feed_queue = queue.Queue(maxsize=max(1, capacity))
+    feed_rate = rate
+    feed_budget = 0.0
+    feed_stop.clear()
+    feed_thread = threading.Thread(
+        target=read_text_feed, args=(source, follow), name="text-feed", daemon=True
+    )
+    feed_thread.start()
+
+
+def stop_text_feed():
+    """Ask the feed reader to stop; stdin readers may linger until their next line."""
+    global feed_thread
+    feed_stop.set()
+    feed_thread = None
+
+
+def read_text_feed(source, follow):
+    """Feed reader thread: push cleaned lines from source into feed_queue."""
+    stream = source == "-" or follow
+    try:
+        if source == "-":
+            for line in sys.stdin:
+                if feed_stop.is_set():
+                    return
+                queue_feed_line(line, stream)
+            return
+
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            if follow:
+                f.seek(0, os.SEEK_END)
+            while not feed_stop.is_set():
+                line = f.readline()
+                if line:
+                    queue_feed_line(line, stream)
+                    continue
+                if not follow:
+                    return
+                # Start over if the log was truncated or rotated in place
+                if os.path.getsize(source) < f.tell():
+                    f.seek(0)
+                feed_stop.wait(FEED_POLL_SECONDS)
+    except OSError as e:
+        print(f"Text feed {source!r} stopped: {e}", file=sys.stderr)
+
+
+def queue_feed_line(line, stream):
+    """Queue one feed line, dropping the oldest queued line if a stream overflows."""
+    global feed_dropped
+    line = line.strip()[:WORD_MAX_CHARS]
+    if not line:
+        return
+    if not stream:
+        # Files can wait; retry so a stop request is still noticed
+        while not feed_stop.is_set():
+            try:
+                feed_queue.put(line, timeout=FEED_POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+        return
+    while True:
+        try:
+            feed_queue.put_nowait(line)
+            return
+        except queue.Full:
+            try:
+                feed_queue.get_nowait()
+                feed_dropped += 1
+            except queue.Empty:
+                pass
+
+
+def drain_text_feed(dt_ms):
+    """Spawn queued feed lines as word rains at feed_rate, never waiting."""
+    global feed_budget
+    if feed_queue is None:
+        return
+    feed_budget = min(feed_budget + feed_rate * dt_ms / 1000.0, FEED_MAX_BURST)
+    while feed_budget >= 1.0:
+        # Backpressure: leave lines queued while the screen is full of words
+        if word_rain_count() >= FEED_SCREEN_FACTOR * max_word_rains:
+            return
+        try:
+            line = feed_queue.get_nowait()
+        except queue.Empty:
+            return
+        spawn_word_rain_from_text(line)
+        feed_budget -= 1.0
 
 
 def trigger_critical_error():
@@ -459,7 +1842,7 @@ def trigger_critical_error():
     global game_mode, puzzle_message, hack_input_mode, hack_buffer
     global trace_level, trace_active
 
-    critical_error_timer = 180  # ~6 seconds at 30fps
+    critical_error_timer = 6 * SIM_FPS  # 6 seconds
     critical_glitch_intensity = 6
     trigger_shake(intensity=critical_glitch_intensity, duration=critical_error_timer)
 
@@ -479,29 +1862,72 @@ def trigger_critical_error():
         sfx_error.play()
 
 
-def apply_critical_error_overlay(surface):
-    """Apply red tint plus glitch lines plus SYSTEM FAILURE while timer is active."""
+def build_critical_overlay():
+    """Pre-fill the red tint layer and lay out the glitch line bank for the scene size."""
+    global error_overlay, glitch_layouts
+
+    # Palette mode tints the palette instead
+    if palette_mode:
+        error_overlay = None
+    else:
+        # One alpha blend of this layer is the whole tint: scene * (1 - a) + red * a
+        error_overlay = display_format(pygame.Surface((SCENE_WIDTH, SCENE_HEIGHT), pygame.SRCALPHA))
+        error_overlay.fill((255, 0, 0, 80))
+
+    # Enough lines for the highest quality level; lower levels use a prefix
+    lines = max(level["glitch_line_count"] for level in QUALITY_LEVELS)
+    glitch_layouts = [
+        [
+            pygame.Rect(
+                glitch_rng.randint(-SCENE_WIDTH // 4, SCENE_WIDTH),
+                glitch_rng.randint(0, SCENE_HEIGHT),
+                glitch_rng.randint(SCENE_WIDTH // 4, SCENE_WIDTH),
+                2,
+            )
+            for _ in range(lines)
+        ]
+        for _ in range(GLITCH_LAYOUT_BANK)
+    ]
+
+
+def render_failure_banner():
+    """Render the SYSTEM FAILURE banner for the current theme and banner font."""
+    global failure_banner
+    if palette_mode:
+        failure_banner = render_indexed_text(big_font, "SYSTEM FAILURE", "banner")
+    else:
+        failure_banner = display_format(big_font.render("SYSTEM FAILURE", True, current_theme["flash"]))
+
+
+def next_glitch_lines():
+    """
+    Count the critical error timer down and pick this frame's glitch lines
+    from a random layout of the bank; None when no error is active.
+    """
     global critical_error_timer
     if critical_error_timer <= 0:
-        return
+        return None
+    critical_error_timer -= frame_step
+    return glitch_layouts[glitch_rng.randrange(GLITCH_LAYOUT_BANK)][:glitch_line_count]
+
 
-    critical_error_timer -= 1
+def apply_critical_error_overlay(surface):
+    """Apply red tint plus glitch lines plus SYSTEM FAILURE while timer is active."""
+    lines = next_glitch_lines()
+    if lines is None:
+        return
 
-    # Red tint overlay
-    error_overlay.fill((255, 0, 0, 80))
-    surface.blit(error_overlay, (0, 0))
+    if error_overlay is not None:
+        surface.blit(error_overlay, (0, 0))
 
-    # Random horizontal glitch lines
-    for _ in range(8):
-        y = random.randint(0, HEIGHT)
-        width = random.randint(WIDTH // 4, WIDTH)
-        x = random.randint(-WIDTH // 4, WIDTH)
-        pygame.draw.rect(surface, (255, 0, 0), (x, y, width, 2))
+    # Horizontal glitch lines
+    line_color = PALETTE_ALERT if palette_mode else ALERT_COLOR
+    for rect in lines:
+        surface.fill(line_color, rect)
 
     # Big SYSTEM FAILURE text
-    text = big_font.render("SYSTEM FAILURE", True, current_theme["flash"])
-    rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    surface.blit(text, rect)
+    rect = failure_banner.get_rect(center=(SCENE_WIDTH // 2, SCENE_HEIGHT // 2))
+    surface.blit(failure_banner, rect)
 
 
 # ==== PUZZLE MODE LOGIC ====
@@ -566,7 +1992,7 @@ def give_puzzle_hint():
 def handle_puzzle_answer(answer_str):
     """Check the player's answer for the current puzzle."""
     global current_puzzle_index, game_mode, puzzle_message, hack_input_mode, hack_buffer
-    global trace_level, trace_active, unlocked_themes, theme_index, current_theme
+    global trace_level, trace_active, unlocked_themes
 
     answer = answer_str.strip().upper()
     current = puzzles[current_puzzle_index]
@@ -598,8 +2024,7 @@ def handle_puzzle_answer(answer_str):
             unlocked_themes = desired_unlocked
 
             # 🔥 Auto-apply the newest unlocked theme
-            theme_index = unlocked_themes - 1
-            current_theme = COLOR_THEMES[theme_index]
+            set_theme(unlocked_themes - 1)
         # ---------- END THEME UNLOCK LOGIC ----------
 
 
@@ -677,6 +2102,51 @@ def exit_puzzle_mode():
     puzzle_type_accum = 0.0
 
 
+# ==== UI LAYER CACHE ====
+# Each UI element keeps its last rendered surface together with the content
+# it was rendered from, and is only re-rendered when that content changes.
+UI_TEXT_COLOR = (200, 200, 200)
+UI_LINE_HEIGHT = 14
+
+ui_layers = {}          # element name -> (content key, surface)
+caption_state = None    # (game_mode, hack_input_mode) shown in the caption
+
+
+def cached_layer(name, key, render):
+    """Return the surface for a UI element, calling render() only if key changed."""
+    entry = ui_layers.get(name)
+    if entry is None or entry[0] != key:
+        entry = (key, display_format(render()))
+        ui_layers[name] = entry
+    return entry[1]
+
+
+def render_text_block(lines, text_font, color):
+    """Render lines of text into one transparent surface, UI_LINE_HEIGHT apart."""
+    width = max(text_font.size(line)[0] for line in lines)
+    height = UI_LINE_HEIGHT * (len(lines) - 1) + text_font.get_height()
+    block = pygame.Surface((width, height), pygame.SRCALPHA)
+    for i, line in enumerate(lines):
+        block.blit(text_font.render(line, True, color), (0, i * UI_LINE_HEIGHT))
+    return block
+
+
+def render_console_bg(size):
+    """Semi-transparent bar behind the console so it stands out."""
+    console_bg = pygame.Surface(size, pygame.SRCALPHA)
+    console_bg.fill((0, 0, 0, 160))
+    return console_bg
+
+
+def update_caption():
+    """Window caption reflects mode; only touch it when the mode changes."""
+    global caption_state
+    state = (game_mode, hack_input_mode)
+    if state != caption_state:
+        set_caption(f"VisionBreaker: Neurogrid  |  mode={game_mode}  hack={hack_input_mode}")
+        caption_state = state
+
+
 def draw_ui_overlay(surface):
     """Draw small text with controls and theme name plus hack console."""
     speed_label = f"{base_speed_factor:.1f}x"
@@ -692,33 +2162,32 @@ def draw_ui_overlay(surface):
 
     flag_str = f" ({' / '.join(mode_flags)})" if mode_flags else ""
 
-    # Window caption reflects mode
-    pygame.display.set_caption(
-        f"VisionBreaker: Neurogrid  |  mode={game_mode}  hack={hack_input_mode}"
-    )
-
+    ui_rects.clear()
+    update_caption()
 
-    lines = [
+    lines = (
         f"Theme: {current_theme['name']}  (Unlocked {unlocked_themes}/{len(COLOR_THEMES)})",
         f"Speed: {speed_label}{flag_str}",
+        f"Quality: {QUALITY_NAMES[quality_level]}{' (auto)' if quality_auto else ''}",
         "C - Theme   Space - Pause",
         "Up/Down - Speed   B - Slow-mo   N - Binary",
         "H - Hack console   P - Puzzle mode",
         "E - Critical error   S - Shake   F11 - Fullscreen",
-        "Esc - Quit / Exit hack",
-    ]
-    y = 6
-    for line in lines:
-        text_surf = ui_font.render(line, True, (200, 200, 200))
-        surface.blit(text_surf, (8, y))
-        y += 14
-
+        "Esc - Quit / Exit hack   F3 - Profiler",
+    )
     # Optional extra line about hints while in puzzle mode
     if game_mode == "puzzle":
-        hint_line = "Puzzle mode: type HINT in the console for a clue (costs trace)"
-        text_surf = ui_font.render(hint_line, True, (200, 200, 200))
-        surface.blit(text_surf, (8, y))
-        y += 14
+        lines += ("Puzzle mode: type HINT in the console for a clue (costs trace)",)
+
+    controls = cached_layer(
+        "controls", lines, lambda: render_text_block(lines, ui_font, UI_TEXT_COLOR)
+    )
+    controls_rect = surface.blit(controls, (8, 6))
+    ui_rects.append(controls_rect)
+
+    # Frame profiler sits to the right of the control text
+    if profiler_visible:
+        draw_profiler_overlay(surface, controls_rect.right + 24, 6)
 
     # Show puzzle prompt if in puzzle mode - typewriter + glow/glitch
     if game_mode == "puzzle" and puzzle_full_line:
@@ -735,33 +2204,37 @@ def draw_ui_overlay(surface):
         visible_text = puzzle_full_line[:puzzle_visible_chars]
 
         if visible_text:
-            # Glow effect using a sine wave between bright and flash
-            t = pygame.time.get_ticks() / 1000.0
+            # Glow effect using a sine wave between bright and flash. The line
+            # is rendered once in each color and the flash copy is blended
+            # over the bright one, so the glow itself never re-renders.
+            t = sim_time_ms / 1000.0
             glow = (math.sin(t * 3.0) + 1.0) * 0.5  # 0..1
 
-            br = current_theme["bright"]
-            fl = current_theme["flash"]
-
-            r = int(br[0] + (fl[0] - br[0]) * glow * 0.5)
-            g = int(br[1] + (fl[1] - br[1]) * glow * 0.5)
-            b = int(br[2] + (fl[2] - br[2]) * glow * 0.5)
-            color = (r, g, b)
-
-            # Render with the bigger puzzle font
-            puzzle_surf = puzzle_font.render(visible_text, True, color)
+            bright = current_theme["bright"]
+            flash = current_theme["flash"]
+            puzzle_surf = cached_layer(
+                "puzzle",
+                (visible_text, bright),
+                lambda: puzzle_font.render(visible_text, True, bright),
+            )
+            flash_surf = cached_layer(
+                "puzzle_flash",
+                (visible_text, flash),
+                lambda: puzzle_font.render(visible_text, True, flash),
+            )
             rect = puzzle_surf.get_rect()
             rect.midbottom = (WIDTH // 2, HEIGHT - 60)
 
             # Little random glitch duplicate
-            if random.random() < 0.06:
-                gx = random.randint(-2, 2)
-                gy = random.randint(-1, 1)
-                glitch_surf = puzzle_font.render(
-                    visible_text, True, current_theme["flash"]
-                )
-                surface.blit(glitch_surf, (rect.x + gx, rect.y + gy))
+            if ui_rng.random() < 0.06:
+                gx = ui_rng.randint(-2, 2)
+                gy = ui_rng.randint(-1, 1)
+                flash_surf.set_alpha(255)
+                ui_rects.append(surface.blit(flash_surf, (rect.x + gx, rect.y + gy)))
 
-            surface.blit(puzzle_surf, rect)
+            ui_rects.append(surface.blit(puzzle_surf, rect))
+            flash_surf.set_alpha(int(glow * 0.5 * 255))
+            surface.blit(flash_surf, rect)
 
 
     # TRACE bar (top right) only in puzzle mode
@@ -773,7 +2246,9 @@ def draw_ui_overlay(surface):
         bar_y = margin + 8
 
         # background
-        pygame.draw.rect(surface, (30, 30, 30), (bar_x, bar_y, bar_width, bar_height))
+        ui_rects.append(
+            pygame.draw.rect(surface, (30, 30, 30), (bar_x, bar_y, bar_width, bar_height))
+        )
 
         # filled portion
         fill_ratio = max(0.0, min(1.0, trace_level / trace_max))
@@ -787,34 +2262,161 @@ def draw_ui_overlay(surface):
         )
 
         # label just above bar
-        label = ui_font.render(
-            f"TRACE {int(trace_level):03d}/{int(trace_max):03d}",
-            True,
-            (200, 200, 200),
+        label_text = f"TRACE {int(trace_level):03d}/{int(trace_max):03d}"
+        label = cached_layer(
+            "trace_label",
+            label_text,
+            lambda: ui_font.render(label_text, True, UI_TEXT_COLOR),
         )
         label_rect = label.get_rect()
         label_rect.bottomright = (bar_x + bar_width, bar_y - 2)
-        surface.blit(label, label_rect)
+        ui_rects.append(surface.blit(label, label_rect))
 
     # Hack console input shown at bottom when active
     if hack_input_mode:
         prompt = f"HACK> {hack_buffer}_"
-        text_surf = hack_font.render(prompt, True, current_theme["bright"])
+        color = current_theme["bright"]
+        text_surf = cached_layer(
+            "hack_prompt", (prompt, color), lambda: hack_font.render(prompt, True, color)
+        )
         rect = text_surf.get_rect()
         rect.topleft = (8, HEIGHT - rect.height - 12)
 
-        # Semi-transparent bar behind the console so it stands out
-        console_bg = pygame.Surface((rect.width + 16, rect.height + 8), pygame.SRCALPHA)
-        console_bg.fill((0, 0, 0, 160))
-        surface.blit(console_bg, (rect.x - 8, rect.y - 4))
+        bg_size = (rect.width + 16, rect.height + 8)
+        console_bg = cached_layer("console_bg", bg_size, lambda: render_console_bg(bg_size))
+        ui_rects.append(surface.blit(console_bg, (rect.x - 8, rect.y - 4)))
 
         surface.blit(text_surf, rect)
 
 
+# ==== INPUT RECORDING / REPLAY ====
+# The recorder writes a JSON lines log: a header with the seed and the options
+# that change what is drawn, then one entry per frame of the boot screen and
+# the main loop with its frame time, key events and any quality level change.
+# Replay feeds the same frame times and events back (the window only
+# contributes QUIT), so with the seeded random streams every frame repeats
+# bit for bit. Text feeds are not part of the log.
+INPUT_LOG_VERSION = 2
+INPUT_HEADER_OPTIONS = (
+    "seed", "resolution", "render_scale", "palette", "quality", "fps",
+    "render_threads", "tiles", "render_processes", "renderer",
+)
+
+input_log = None        # file the recorder writes to
+input_entry = None      # entry of the frame in progress
+input_clock_ms = 0.0    # recorded time since the first frame
+input_replay = None     # iterator over the entries of a replay log
+input_pending = None    # next replay entry, peeked to see its phase
+
+
+def start_input_recording(path, options):
+    """Start logging frames to path after a header of the run's options."""
+    global input_log, input_clock_ms
+    input_log = open(path, "w", encoding="utf-8")
+    header = {"version": INPUT_LOG_VERSION}
+    header.update((name, getattr(options, name)) for name in INPUT_HEADER_OPTIONS)
+    input_log.write(json.dumps(header) + "\n")
+    input_clock_ms = 0.0
+
+
+def stop_input_recording():
+    """Write the last frame and close the input log."""
+    global input_log
+    if input_log is not None:
+        flush_input_entry()
+        input_log.close()
+        input_log = None
+
+
+def flush_input_entry():
+    """Write the finished frame entry to the input log."""
+    global input_entry
+    if input_entry is not None:
+        input_log.write(json.dumps(input_entry, separators=(",", ":")) + "\n")
+        input_entry = None
+
+
+def start_input_replay(path, options):
+    """Load a replay log and apply its recorded options over options."""
+    global input_replay, input_pending
+    f = open(path, "r", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("version") not in range(1, INPUT_LOG_VERSION + 1):
+        raise SystemExit(f"{path}: unsupported input log version {header.get('version')}")
+    for name in INPUT_HEADER_OPTIONS:
+        if name not in header:
+            continue  # older logs predate the option; it keeps its command line value
+        value = header[name]
+        setattr(options, name, tuple(value) if isinstance(value, list) else value)
+    input_replay = (json.loads(line) for line in f)
+    input_pending = next(input_replay, None)
+
+
+def begin_input_frame(phase, dt_ms):
+    """
+    Start a frame of phase ("boot" or "main"). Returns the frame time to
+    simulate: dt_ms live, the recorded one on replay, or None once the
+    replay log has no more frames for this phase.
+    """
+    global input_entry, input_pending, input_clock_ms
+    if input_replay is not None:
+        # A log recorded with a boot screen replays fine without one
+        while phase == "main" and input_pending is not None and input_pending["phase"] == "boot":
+            input_pending = next(input_replay, None)
+        if input_pending is None or input_pending["phase"] != phase:
+            return None
+        input_entry = input_pending
+        input_pending = next(input_replay, None)
+        return input_entry["dt"]
+
+    if input_log is not None:
+        flush_input_entry()
+        input_clock_ms += dt_ms
+        input_entry = {"phase": phase, "t": round(input_clock_ms, 3), "dt": dt_ms}
+    return dt_ms
+
+
+def input_events():
+    """This frame's events: live (and logged when recording), or replayed."""
+    if input_replay is not None:
+        # Closing the window still ends a replay
+        events = [event for event in pygame.event.get() if event.type == pygame.QUIT]
+        if input_entry is not None:
+            for key, unicode in input_entry.get("keys", ()):
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0))
+        return events
+
+    events = pygame.event.get()
+    if input_entry is not None and input_replay is None:
+        keys = [[event.key, event.unicode] for event in events if event.type == pygame.KEYDOWN]
+        if keys:
+            input_entry["keys"] = keys
+        if any(event.type == pygame.QUIT for event in events):
+            input_entry["quit"] = True
+    return events
+
+
+def note_input(name, value):
+    """Attach a value to this frame's log entry (e.g. a quality change)."""
+    if input_log is not None and input_entry is not None:
+        input_entry[name] = value
+
+
+def replayed_input(name):
+    """The value note_input() attached to this frame when it was recorded."""
+    if input_entry is None:
+        return None
+    return input_entry.get(name)
+
+
 # ==== BOOT SCREEN WITH RED / BLUE PILL ====
 def show_boot_screen():
-    boot_font = pygame.font.SysFont("consolas", 24)
-    small_font = pygame.font.SysFont("consolas", 18)
+    # Starts on pygame's default font if the font paths are still being
+    # resolved, and switches once they arrive
+    fonts_final = font_paths_ready.is_set()
+    boot_font = load_font("consolas", 24)
+    small_font = load_font("consolas", 18)
+    first_frame = True
 
     boot_lines = [
         "BOOT SEQUENCE - NEUROGRID TERMINAL",
@@ -834,10 +2436,17 @@ def show_boot_screen():
     local_clock = pygame.time.Clock()
 
     while boot_running:
-        dt = local_clock.tick(60)
+        dt = begin_input_frame("boot", local_clock.tick(60))
+        if dt is None:
+            break  # replay log went past the boot screen
         last_reveal_time += dt
 
-        for event in pygame.event.get():
+        if not fonts_final and font_paths_ready.is_set():
+            fonts_final = True
+            boot_font = load_font("consolas", 24)
+            small_font = load_font("consolas", 18)
+
+        for event in input_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -891,22 +2500,19 @@ def show_boot_screen():
             choice_surf = small_font.render(boot_buffer + "_", True, (0, 255, 0))
             screen.blit(choice_surf, (WIDTH // 2 - 120, HEIGHT // 2 + 130))
 
-        pygame.display.flip()
-
-
-# ============= BOOTSTRAP =============
-init_surfaces()
-init_audio()
-show_boot_screen()
+        flip_display()
+        if first_frame:
+            first_frame = False
+            startup_mark("boot screen")
 
-while running:
-    # One tick per frame
-    dt_ms = clock.tick(30)
-    last_dt_ms = dt_ms  # store for UI effects like typewriter
 
+# ==== FRAME LOOP ====
+def handle_events():
+    """Process keyboard and window events for one frame."""
+    global running, paused, hack_input_mode, hack_buffer
+    global base_speed_factor, slow_mo, binary_mode
 
-    # Event handling
-    for event in pygame.event.get():
+    for event in input_events():
         if event.type == pygame.QUIT:
             running = False
 
@@ -981,17 +2587,21 @@ while running:
 
             elif event.key == pygame.K_s:
                 trigger_shake(
-                    intensity=random.randint(2, 5),
-                    duration=random.randint(15, 30),
+                    intensity=shake_rng.randint(2, 5),
+                    duration=shake_rng.randint(15, 30),
                 )
 
             elif event.key == pygame.K_F11:
                 toggle_fullscreen()
 
-    # Effective speed (base * slow-mo multiplier)
-    effective_speed = base_speed_factor * (0.3 if slow_mo else 1.0)
+            elif event.key == pygame.K_F3:
+                toggle_profiler()
+
+
+def update_trace(dt_ms):
+    """TRACE progression while in puzzle mode."""
+    global trace_level, trace_active
 
-    # TRACE progression while in puzzle mode
     if (
         game_mode == "puzzle"
         and not paused
@@ -1004,94 +2614,1839 @@ while running:
             trace_active = False
             trigger_critical_error()
 
-    if paused:
-        apply_critical_error_overlay(scene_surface)
-        offset_x, offset_y = get_shake_offset()
-        screen.fill(current_theme["bg"])
-        screen.blit(scene_surface, (offset_x, offset_y))
-        draw_ui_overlay(screen)
 
+def clear_scene():
+    """Clear the scene to the theme background."""
+    scene_surface.fill(PALETTE_BG if palette_mode else current_theme["bg"])
+
+
+def draw_rain(effective_speed):
+    """Draw and advance the main rain and its trails."""
+    ys, rows, codes, chars, roles = step_rain_columns(effective_speed)
+
+    # Trails first so the heads sit on top of them
+    update_trails(rows, codes)
+    if render_pool is not None:
+        draw_rain_threaded(ys, chars, roles)
+    else:
+        draw_trails(scene_surface)
+        scene_surface.blits(
+            [
+                (glyph_atlas[(char, role)], (x, y))
+                for x, y, char, role in zip(x_positions.tolist(), ys, chars, roles)
+            ],
+            doreturn=False,
+        )
+
+    if dirty_rects_enabled:
+        record_rain_extents(np.asarray(ys))
+
+
+def present_frame(scene_changed=True):
+    """
+    Shake-blit the scene to the screen, draw the UI on top and flip. In
+    dirty-rect mode only the regions that changed are copied and updated.
+    """
+    global full_present_pending, presented_ui_rects, presented_rain_extents
+    global presented_word_rain_rects, presented_ui_key
+
+    # Camera shake on the rain scene only
+    offset_x, offset_y = get_shake_offset()
+
+    if sdl_renderer is not None:
+        present_rendered_frame(offset_x, offset_y)
+        full_present_pending = (offset_x, offset_y) != (0, 0) or critical_overlay_drawn
+        presented_ui_key = ui_state_key()
+        return
+
+    # A new palette recolors every pixel of an indexed scene
+    background = current_theme["bg"]
+    recolored = False
+    if palette_mode:
+        recolored = update_scene_palette()
+        background = scene_bg_color
+
+    # Shake and the critical error overlay move every pixel; they also leave
+    # the next frame to be presented in full so nothing of them lingers
+    effects = (offset_x, offset_y) != (0, 0) or critical_overlay_drawn
+    dirty = None
+    if dirty_rects_enabled and not effects and not full_present_pending and not recolored:
+        dirty = collect_dirty_rects(scene_changed)
+
+    # Bring a reduced-resolution scene up to screen size (indexed surfaces
+    # can only be scaled, not smoothscaled)
+    source = scene_view
+    if upscaled_surface is not None and (scene_changed or dirty is None):
+        smooth = smooth_upscale and not palette_mode
+        upscale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        upscale(scene_surface, (WIDTH, HEIGHT), upscaled_surface)
+    if upscaled_surface is not None:
+        source = upscaled_surface
+
+    if dirty is None:
+        screen.fill(background)
+        screen.blit(source, (offset_x, offset_y))
+    else:
+        for rect in dirty:
+            screen.blit(source, rect, rect)
+    end_stage("shake")
+
+    # Draw UI overlay after shake so it stays fixed
+    draw_ui_overlay(screen)
+    end_stage("ui")
+
+    if dirty is None:
         pygame.display.flip()
-        continue
+    else:
+        pygame.display.update(dirty + ui_rects)
+    end_stage("flip")
+
+    full_present_pending = effects
+    presented_ui_rects = list(ui_rects)
+    presented_rain_extents = rain_extents
+    presented_word_rain_rects = list(word_rain_rects)
+    presented_ui_key = ui_state_key()
+
+
+# ==== DIRTY RECTANGLES ====
+# The screen always shows the previous scene plus the previous UI. A frame
+# only has to restore the scene where the rain, word rains or UI were drawn
+# last frame or are drawn now, and present just those regions.
+DIRTY_FULL_AREA = 0.5  # above this share of the screen a full flip is cheaper
+
+dirty_rects_enabled = False
+full_present_pending = True      # next present must redraw the whole screen
+critical_overlay_drawn = False   # this frame's scene has the error overlay
+
+ui_rects = []                    # regions draw_ui_overlay() drew this frame
+word_rain_rects = []             # regions covered by word rains this frame
+rain_extents = None              # (tops, bottoms) of each column this frame
+presented_ui_rects = []
+presented_word_rain_rects = []
+presented_rain_extents = None
+presented_ui_key = None          # ui_state_key() of the last presented frame
+
+
+def request_full_present():
+    """Make the next present redraw the whole screen (resize, theme change)."""
+    global full_present_pending, rain_extents, presented_rain_extents
+    full_present_pending = True
+    rain_extents = None
+    presented_rain_extents = None
+
+
+def record_rain_extents(ys):
+    """Remember the vertical span each column's head and trail covered."""
+    global rain_extents
+    glyph_h = glyph_box[1]
+    trail_tops = (trail_rows - (trail_length - 1)) * FONT_SIZE
+    rain_extents = (
+        np.minimum(trail_tops, ys),
+        np.maximum(trail_tops + trail_length * FONT_SIZE, ys + glyph_h),
+    )
 
-    # Clear scene and apply background
-    scene_surface.fill(current_theme["bg"])
 
-    # Fading trail effect
-    trail_surface.fill((0, 0, 0, 80))
-    scene_surface.blit(trail_surface, (0, 0))
+def collect_dirty_rects(scene_changed):
+    """
+    Regions of the screen that must be restored from the scene this frame,
+    or None when a full present is needed or cheaper.
+    """
+    rects = list(presented_ui_rects)
+
+    if scene_changed:
+        if rain_extents is None or presented_rain_extents is None:
+            return None
+        if len(rain_extents[0]) != len(presented_rain_extents[0]):
+            return None
+
+        tops = np.maximum(np.minimum(rain_extents[0], presented_rain_extents[0]), 0)
+        bottoms = np.minimum(
+            np.maximum(rain_extents[1], presented_rain_extents[1]), SCENE_HEIGHT
+        )
+        changed = np.flatnonzero(bottoms > tops)
+        # Heads can be a little wider than a cell
+        width = max(FONT_SIZE, glyph_box[0])
+        scene_rects = [
+            pygame.Rect(x, top, width, bottom - top)
+            for x, top, bottom in zip(
+                x_positions[changed].tolist(),
+                tops[changed].tolist(),
+                bottoms[changed].tolist(),
+            )
+        ]
+        scene_rects += presented_word_rain_rects
+        scene_rects += word_rain_rects
+        rects += [scene_to_screen_rect(rect) for rect in scene_rects]
+
+    if sum(r.width * r.height for r in rects) > DIRTY_FULL_AREA * WIDTH * HEIGHT:
+        return None
+    return rects
+
+
+def scene_to_screen_rect(rect):
+    """Map a scene-space rect onto the (possibly upscaled) screen."""
+    if upscaled_surface is None:
+        return rect
+    sx = WIDTH / SCENE_WIDTH
+    sy = HEIGHT / SCENE_HEIGHT
+    # Pad so rounding (and smoothscale's filtering across a source pixel)
+    # at the edges is covered
+    pad = int(math.ceil(max(sx, sy))) + 1 if smooth_upscale and not palette_mode else 1
+    left = int(rect.left * sx) - pad
+    top = int(rect.top * sy) - pad
+    right = int(math.ceil(rect.right * sx)) + pad
+    bottom = int(math.ceil(rect.bottom * sy)) + pad
+    return pygame.Rect(left, top, right - left, bottom - top).clip(0, 0, WIDTH, HEIGHT)
+
+
+def ui_state_key():
+    """Everything that changes what the UI overlay shows outside puzzle mode."""
+    return (
+        current_theme["name"],
+        unlocked_themes,
+        base_speed_factor,
+        slow_mo,
+        binary_mode,
+        game_mode,
+        hack_input_mode,
+        hack_buffer,
+        profiler_visible,
+        quality_level,
+        quality_auto,
+        WIDTH,
+        HEIGHT,
+    )
 
-    # Draw main rain
-    for i, x in enumerate(x_positions):
-        y = int(raindrops[i] * FONT_SIZE)
 
-        # Random glyph
-        if binary_mode:
-            char = random.choice("01")
+def is_idle():
+    """
+    True while paused with nothing animating, so the frame would present
+    exactly what is already on screen.
+    """
+    return (
+        paused
+        and critical_error_timer <= 0
+        and shake_timer <= 0
+        and game_mode != "puzzle"  # puzzle line glows and types out
+        and not profiler_visible
+        and not full_present_pending
+        and theme_fade >= 1.0
+        and ui_state_key() == presented_ui_key
+    )
+
+
+# ---- Stage timing ----
+# Wall time of each stage of the last frame in ms; stages a frame skipped
+# (paused, headless presentation) read 0.
+FRAME_STAGES = (
+    "events",
+    "trace",
+    "clear",
+    "rain",
+    "word_rains",
+    "critical_error",
+    "shake",
+    "ui",
+    "flip",
+    "capture",
+)
+frame_stage_ms = dict.fromkeys(FRAME_STAGES, 0.0)
+_stage_start = 0.0
+
+
+def begin_frame_timing():
+    """Zero the stage timings and start the clock for the first stage."""
+    global _stage_start
+    for stage in FRAME_STAGES:
+        frame_stage_ms[stage] = 0.0
+    _stage_start = time.perf_counter()
+
+
+def end_stage(stage):
+    """Record the time since the previous stage ended under the given stage."""
+    global _stage_start
+    now = time.perf_counter()
+    frame_stage_ms[stage] = (now - _stage_start) * 1000.0
+    _stage_start = now
+
+
+# ==== FRAME PROFILER ====
+# Rolling per-stage statistics for the F3 overlay, plus an optional
+# per-frame log so field stutters can be traced to a stage afterwards.
+PROFILE_WINDOW = 120        # frames in the rolling window
+PROFILE_STATS_INTERVAL = 15  # frames between overlay percentile refreshes
+
+profiler_visible = False
+profile_history = {stage: deque(maxlen=PROFILE_WINDOW) for stage in FRAME_STAGES + ("total",)}
+profile_stats = {}  # stage -> (avg, p95, p99) shown by the overlay
+profile_frame = 0
+profile_log = None
+profile_log_csv = False
+
+
+def open_profile_log(path):
+    """Start streaming per-frame stage timings to path (CSV or JSON lines)."""
+    global profile_log, profile_log_csv
+    profile_log_csv = path.lower().endswith(".csv")
+    profile_log = open(path, "w", encoding="utf-8")
+    if profile_log_csv:
+        profile_log.write(",".join(("frame", "dt_ms") + FRAME_STAGES + ("total",)) + "\n")
+
+
+def close_profile_log():
+    """Flush and close the profile log if one is open."""
+    global profile_log
+    if profile_log is not None:
+        profile_log.close()
+        profile_log = None
+
+
+def record_frame_profile(dt_ms):
+    """Add the last frame's stage timings to the rolling window and the log."""
+    global profile_frame
+
+    total = sum(frame_stage_ms.values())
+    for stage in FRAME_STAGES:
+        profile_history[stage].append(frame_stage_ms[stage])
+    profile_history["total"].append(total)
+
+    if profile_log is not None:
+        if profile_log_csv:
+            values = [str(profile_frame), str(dt_ms)]
+            values += [f"{frame_stage_ms[stage]:.4f}" for stage in FRAME_STAGES]
+            values.append(f"{total:.4f}")
+            profile_log.write(",".join(values) + "\n")
         else:
-            char = random.choice(char_pool)
-
-        # Glitch / bright effects
-        r = random.random()
-        if r > 0.985:
-            color = current_theme["flash"]
-        elif r > 0.95 and not binary_mode:
-            char = random.choice("01")
-            color = current_theme["bright"]
+            sample = {"frame": profile_frame, "dt_ms": dt_ms}
+            sample.update((stage, round(frame_stage_ms[stage], 4)) for stage in FRAME_STAGES)
+            sample["total"] = round(total, 4)
+            profile_log.write(json.dumps(sample) + "\n")
+
+    # Percentiles are only worth computing while someone is looking
+    if profiler_visible and profile_frame % PROFILE_STATS_INTERVAL == 0:
+        for stage, history in profile_history.items():
+            arr = np.fromiter(history, dtype=float)
+            p95, p99 = np.percentile(arr, (95, 99))
+            profile_stats[stage] = (arr.mean(), p95, p99)
+
+    profile_frame += 1
+    if memory_tracking:
+        track_memory()
+
+
+def toggle_profiler():
+    """Show or hide the frame profiler overlay."""
+    global profiler_visible
+    profiler_visible = not profiler_visible
+    profile_stats.clear()
+
+
+def render_profiler_table():
+    """Render the avg / p95 / p99 per stage table into one surface."""
+    name_w = ui_font.size("critical_error")[0] + 12
+    value_w = ui_font.size("000.00")[0] + 8
+
+    rows = [("stage (ms)", "avg", "p95", "p99")]
+    for stage in FRAME_STAGES + ("total",):
+        stats = profile_stats.get(stage)
+        if stats is None:
+            rows.append((stage, "-", "-", "-"))
         else:
-            color = (
-                current_theme["bright"]
-                if random.random() > 0.95
-                else current_theme["main"]
-            )
+            rows.append((stage,) + tuple(f"{value:.2f}" for value in stats))
 
-        text = font.render(char, True, color)
-        scene_surface.blit(text, (x, y))
+    table = pygame.Surface(
+        (name_w + 3 * value_w, UI_LINE_HEIGHT * len(rows)), pygame.SRCALPHA
+    )
+    # Cells are placed individually so columns line up with any UI font
+    for i, row in enumerate(rows):
+        y = i * UI_LINE_HEIGHT
+        table.blit(ui_font.render(row[0], True, UI_TEXT_COLOR), (0, y))
+        for col, cell in enumerate(row[1:]):
+            cell_surf = ui_font.render(cell, True, UI_TEXT_COLOR)
+            right = name_w + (col + 1) * value_w
+            table.blit(cell_surf, (right - cell_surf.get_width(), y))
+    return table
+
+
+def draw_profiler_overlay(surface, x, y):
+    """Draw the rolling avg / p95 / p99 per stage table at (x, y)."""
+    # profile_stats is replaced every PROFILE_STATS_INTERVAL frames
+    key = tuple(sorted(profile_stats.items()))
+    table = cached_layer("profiler", key, render_profiler_table)
+    ui_rects.append(surface.blit(table, (x, y)))
+
+
+# ==== MEMORY INSTRUMENTATION ====
+# For displays that run for weeks: every memory_interval frames, sample the
+# process RSS, the Python heap (tracemalloc, with the allocation sites that
+# grew most since the baseline), the tracked Surfaces still alive and the
+# tracked Surfaces created since the last sample. Only Surfaces made
+# at the engine's own creation sites (display_format, make_scene_layer and the
+# render strip copies) are counted: they register with track_surface(), which
+# is skipped unless instrumentation is on. soak_test.py drives this.
+MEMORY_TOP_SITES = 5    # allocation sites listed per sample
+MEMORY_HISTORY = 8640   # samples kept in memory_samples (a day at the default interval)
+
+memory_tracking = False
+memory_log = None
+memory_interval = MEMORY_DEFAULT_INTERVAL
+memory_frame = 0
+memory_started = 0.0
+memory_baseline = None  # tracemalloc snapshot growth is measured against
+memory_samples = deque(maxlen=MEMORY_HISTORY)
+surfaces_created = 0
+surfaces_created_frame = 0  # memory_frame of the previous sample
+tracked_surfaces = weakref.WeakSet()  # tracked Surfaces still alive anywhere
+
+
+def track_surface(surface):
+    """Count a Surface made at one of the engine's creation sites."""
+    global surfaces_created
+    tracked_surfaces.add(surface)
+    surfaces_created += 1
+
+
+def start_memory_instrumentation(path=None, interval=MEMORY_DEFAULT_INTERVAL):
+    """
+    Start tracing allocations and counting Surfaces; samples go to path (JSON
+    lines) if given and to memory_samples. Call before the scene and its
+    surfaces are built so all of them are counted.
+    """
+    global memory_tracking, memory_log, memory_interval, memory_frame, memory_started
+    global memory_baseline, surfaces_created, surfaces_created_frame
+    tracemalloc.start()
+    memory_log = open(path, "w", encoding="utf-8") if path else None
+    memory_interval = max(1, interval)
+    memory_frame = 0
+    memory_started = time.perf_counter()
+    memory_baseline = None
+    memory_samples.clear()
+    surfaces_created = 0
+    surfaces_created_frame = 0
+    tracked_surfaces.clear()
+    memory_tracking = True
+
+
+def stop_memory_instrumentation():
+    """Close the memory log and stop tracing."""
+    global memory_tracking, memory_log
+    if not memory_tracking:
+        return
+    memory_tracking = False
+    if memory_log is not None:
+        memory_log.close()
+        memory_log = None
+    tracked_surfaces.clear()
+    tracemalloc.stop()
 
-        # Trails
-        for t in range(trail_length):
-            trail_y = y - t * FONT_SIZE
-            if trail_y > 0:
-                if random.random() > 0.5 and not binary_mode:
-                    trail_char = random.choice(char_pool)
-                else:
-                    trail_char = char
-                trail_text = font.render(trail_char, True, current_theme["trail"])
-                trail_surface.blit(trail_text, (x, trail_y))
-
-        # Move drop
-        raindrops[i] += speeds[i] * effective_speed
-
-        # Random shake trigger
-        if random.random() > 0.997:
-            trigger_shake(
-                intensity=random.randint(1, 3),
-                duration=random.randint(10, 25),
-            )
 
-        # Reset drop randomly after leaving screen
-        if y > HEIGHT and random.random() > 0.9:
-            raindrops[i] = random.randint(-10, 0)
-            speeds[i] = random.uniform(0.4, 1.2)
+def reset_memory_baseline():
+    """Measure allocation growth from now on (e.g. once caches are warm)."""
+    global memory_baseline
+    memory_baseline = heap_snapshot()
+
+
+def heap_snapshot():
+    """A tracemalloc snapshot without tracemalloc's own allocations."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+
+
+def process_rss_kb():
+    """Resident memory of this process in KiB, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # optional; covers Windows and macOS
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss // 1024
+
+
+def surface_census():
+    """Count and KiB of the tracked Surfaces that are still alive."""
+    count = 0
+    size = 0
+    for surface in list(tracked_surfaces):
+        count += 1
+        # Subsurfaces share their parent's pixels
+        if surface.get_parent() is None:
+            size += surface.get_pitch() * surface.get_height()
+    return count, size // 1024
+
+
+def track_memory():
+    """Count the frame and take a sample every memory_interval frames."""
+    global memory_frame
+    if memory_frame % memory_interval == 0:
+        sample_memory()
+    memory_frame += 1
+
+
+def sample_memory():
+    """Take one memory sample, log it and add it to memory_samples."""
+    global memory_baseline, surfaces_created, surfaces_created_frame
+    snapshot = heap_snapshot()
+    if memory_baseline is None:
+        memory_baseline = snapshot
+    current, peak = tracemalloc.get_traced_memory()
+    live, live_kb = surface_census()
+    frames = max(1, memory_frame - surfaces_created_frame)
+
+    sample = {
+        "frame": memory_frame,
+        "seconds": round(time.perf_counter() - memory_started, 1),
+        "rss_kb": process_rss_kb(),
+        "python_kb": current // 1024,
+        "python_peak_kb": peak // 1024,
+        "surfaces_live": live,
+        "surfaces_kb": live_kb,
+        "surfaces_created": surfaces_created,
+        "surfaces_per_frame": round(surfaces_created / frames, 2),
+        "word_rains": word_rain_count(),
+        "growth": [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.1f} KiB"
+            for stat in snapshot.compare_to(memory_baseline, "lineno")[:MEMORY_TOP_SITES]
+            if stat.size_diff > 0
+        ],
+    }
+    surfaces_created = 0
+    surfaces_created_frame = memory_frame
+
+    memory_samples.append(sample)
+    if memory_log is not None:
+        memory_log.write(json.dumps(sample) + "\n")
+        memory_log.flush()
+    return sample
+
+
+# ==== FRAME RECORDING ====
+# Each frame is copied into one of a ring of preallocated buffers and handed
+# to a writer thread, which saves it as a PNG or pipes it into ffmpeg. When
+# the writer falls behind and no buffer is free the frame is dropped rather
+# than stalling the render loop; headless runs, which have no real-time
+# deadline, wait for the writer instead so no frame is lost. If the writer
+# or ffmpeg dies, recording stops rather than waiting on it forever.
+RECORD_POLL_SECONDS = 0.5  # how often a waiting capture checks the writer is alive
+
+record_source = None       # "screen" or "scene" while recording
+record_wait = False        # wait for a free buffer instead of dropping frames
+record_buffers = []        # ring of (height, width, 3) uint8 frames
+record_free = None         # queue of buffer indexes the capture may fill
+record_ready = None        # queue of (buffer index, frame number) to write
+record_writer = None
+record_failed = False      # the encoder died; the writer only drains the queue
+record_surface = None      # 32-bit staging surface for indexed scenes
+record_frames = 0
+record_dropped = 0
+
+
+def record_path_pattern(path):
+    """Turn a PNG --record target into a %-pattern of numbered files."""
+    root, ext = os.path.splitext(path)
+    if "%" not in path:
+        if ext.lower() == ".png":
+            path = f"{root}_%06d.png"
+        else:
+            path = os.path.join(path, "frame_%06d.png")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return path
+
+
+def start_recording(path, source, buffers, fps, wait=False):
+    """Allocate the capture ring and start the writer for path."""
+    global record_source, record_buffers, record_free, record_ready, record_writer
+    global record_surface, record_frames, record_dropped, record_wait, record_failed
+
+    surface = screen_image() if source == "screen" else scene_image()
+    width, height = surface.get_size()
+    record_source = source
+    record_wait = wait
+    record_buffers = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(max(1, buffers))]
+    record_free = queue.Queue()
+    for index in range(len(record_buffers)):
+        record_free.put(index)
+    record_ready = queue.Queue()
+    record_surface = pygame.Surface((width, height), 0, 32)
+    record_frames = 0
+    record_dropped = 0
+    record_failed = False
+
+    if os.path.splitext(path)[1].lower() in RECORD_VIDEO_EXTENSIONS:
+        encoder = open_video_encoder(path, width, height, fps)
+        target = (write_video_frames, (encoder,))
+    else:
+        target = (write_png_frames, (record_path_pattern(path),))
+    record_writer = threading.Thread(
+        target=target[0], args=target[1], name="frame-writer", daemon=True
+    )
+    record_writer.start()
+
+
+def open_video_encoder(path, width, height, fps):
+    """Start ffmpeg reading raw RGB frames from a pipe."""
+    ffmpeg = os.environ.get("VISIONBREAKER_FFMPEG") or shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise SystemExit("Recording video needs ffmpeg on the PATH (or VISIONBREAKER_FFMPEG)")
+    command = [
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "-",
+    ]
+    if not path.lower().endswith(".gif"):
+        # Most players want yuv420p, which needs even dimensions
+        command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+    return subprocess.Popen(command + [path], stdin=subprocess.PIPE)
+
+
+def write_png_frames(pattern):
+    """Writer thread: save queued frames as numbered PNG files."""
+    while True:
+        item = record_ready.get()
+        if item is None:
+            return
+        index, frame = item
+        buffer = record_buffers[index]
+        try:
+            image = pygame.image.frombuffer(buffer, (buffer.shape[1], buffer.shape[0]), "RGB")
+            pygame.image.save(image, pattern % frame)
+            del image
+        except (pygame.error, OSError) as e:
+            # Keep draining so capture never waits on a dead writer
+            print(f"Frame {frame} not saved: {e}", file=sys.stderr)
+        record_free.put(index)
+
+
+def write_video_frames(encoder):
+    """
+    Writer thread: pipe queued frames into the encoder, then close it. Once
+    the encoder has died the rest of the queue is drained unwritten, so
+    capture never waits on it.
+    """
+    global record_failed
+    try:
+        while True:
+            item = record_ready.get()
+            if item is None:
+                break
+            index, frame = item
+            if not record_failed:
+                try:
+                    encoder.stdin.write(record_buffers[index].data)
+                except OSError as e:
+                    print(f"Video encoder failed at frame {frame}: {e}", file=sys.stderr)
+                    record_failed = True
+            record_free.put(index)
+    finally:
+        try:
+            encoder.stdin.close()
+        except OSError:
+            pass  # the pipe is already broken
+        encoder.wait()
+
+
+def capture_frame():
+    """Copy this frame into a free ring buffer and queue it for the writer."""
+    global record_frames, record_dropped
+    if record_writer is None:
+        return
+
+    if record_failed or not record_writer.is_alive():
+        stop_recording()
+        return
+
+    surface = screen_image() if record_source == "screen" else scene_image()
+    index = None
+    while index is None:
+        try:
+            index = record_free.get(block=record_wait, timeout=RECORD_POLL_SECONDS)
+        except queue.Empty:
+            if not record_wait:
+                record_dropped += 1
+                return
+            if record_failed or not record_writer.is_alive():
+                stop_recording()
+                return
+    buffer = record_buffers[index]
+    if surface.get_size() != (buffer.shape[1], buffer.shape[0]):
+        # The window was resized; the recording keeps its original size
+        record_free.put(index)
+        record_dropped += 1
+        return
+
+    if surface.get_bitsize() < 24:
+        record_surface.blit(surface, (0, 0))
+        surface = record_surface
+    pixels = pygame.surfarray.pixels3d(surface)
+    np.copyto(buffer, pixels.transpose(1, 0, 2))
+    del pixels  # unlocks the surface
+    record_ready.put((index, record_frames))
+    record_frames += 1
+
+
+def stop_recording():
+    """Let the writer finish every queued frame and report how it went."""
+    global record_writer
+    if record_writer is None:
+        return
+    record_ready.put(None)
+    record_writer.join()
+    record_writer = None
+    print(f"Recorded {record_frames} frames ({record_dropped} dropped)")
+    if record_failed:
+        print("Recording stopped early: the video encoder exited", file=sys.stderr)
+
+
+# ==== QUALITY GOVERNOR ====
+# Watches the smoothed frame work time against the frame budget and steps
+# QUALITY_LEVELS down while over it and up while well under it. The flip
+# stage is not work the levels can shrink, and with --vsync it is mostly
+# waiting for the display, so it is left out of the work time. The gap
+# between the two thresholds, the frame counts and the backoff after a
+# failed step up keep the level from oscillating.
+QUALITY_SMOOTHING = 0.1          # weight of the newest frame in the average
+QUALITY_DEGRADE_FRAMES = 20      # frames over budget before stepping down
+QUALITY_UPGRADE_FRAMES = 180     # frames under the headroom before stepping up
+QUALITY_UPGRADE_HEADROOM = 0.6   # share of the budget a step up must stay below
+QUALITY_MAX_UPGRADE_WAIT = 8 * QUALITY_UPGRADE_FRAMES
+QUALITY_SETTLE_FRAMES = 30       # frames ignored after a change or resize
+QUALITY_UNCAPPED_FPS = 60        # budget used with --fps 0
+
+quality_auto = True
+quality_level = QUALITY_DEFAULT_LEVEL
+quality_frame_ms = 0.0           # smoothed work time of rendered frames
+quality_over_frames = 0
+quality_under_frames = 0
+quality_settle_frames = QUALITY_SETTLE_FRAMES
+quality_upgrade_wait = QUALITY_UPGRADE_FRAMES
+quality_frames_since_upgrade = None  # None until the governor steps up
+
+
+def set_quality_knobs(level):
+    """Copy a QUALITY_LEVELS entry into the detail knobs (no rebuilding)."""
+    global quality_level, trail_length, column_density
+    global effect_chance_scale, max_word_rains, glitch_line_count
+
+    settings = QUALITY_LEVELS[level]
+    quality_level = level
+    trail_length = settings["trail_length"]
+    column_density = settings["column_density"]
+    effect_chance_scale = settings["effect_chance_scale"]
+    max_word_rains = settings["max_word_rains"]
+    glitch_line_count = settings["glitch_line_count"]
+
+
+def change_quality_level(level):
+    """Switch to another quality level, rebuilding only what it affects."""
+    old_trail_length, old_density = trail_length, column_density
+    set_quality_knobs(level)
+    if column_density != old_density:
+        build_rain_columns(carry_over=True)
+    if column_density != old_density or trail_length != old_trail_length:
+        reset_trails()
+        request_full_present()
+    reset_quality_governor()
+
+
+def reset_quality_governor():
+    """Forget the measured frame times, e.g. after a level change or resize."""
+    global quality_frame_ms, quality_over_frames, quality_under_frames
+    global quality_settle_frames
+    quality_frame_ms = 0.0
+    quality_over_frames = 0
+    quality_under_frames = 0
+    quality_settle_frames = QUALITY_SETTLE_FRAMES
+
+
+def update_quality(work_ms):
+    """Feed one rendered frame's work time to the governor."""
+    global quality_frame_ms, quality_over_frames, quality_under_frames
+    global quality_settle_frames, quality_upgrade_wait, quality_frames_since_upgrade
+
+    # A replay repeats the recorded level changes instead of measuring
+    if input_replay is not None:
+        level = replayed_input("quality")
+        if level is not None:
+            change_quality_level(level)
+        return
+    if not quality_auto:
+        return
+    if quality_frames_since_upgrade is not None:
+        quality_frames_since_upgrade += 1
+    # Caches and strips rebuilt by the last change make the next frames slow
+    if quality_settle_frames > 0:
+        quality_settle_frames -= 1
+        quality_frame_ms = work_ms
+        return
+
+    quality_frame_ms += (work_ms - quality_frame_ms) * QUALITY_SMOOTHING
+    budget_ms = 1000.0 / (config.fps or QUALITY_UNCAPPED_FPS)
+
+    if quality_frame_ms > budget_ms:
+        quality_over_frames += 1
+        quality_under_frames = 0
+    elif quality_frame_ms < budget_ms * QUALITY_UPGRADE_HEADROOM:
+        quality_under_frames += 1
+        quality_over_frames = 0
+    else:
+        quality_over_frames = 0
+        quality_under_frames = 0
+
+    if quality_over_frames >= QUALITY_DEGRADE_FRAMES and quality_level < len(QUALITY_LEVELS) - 1:
+        # Stepping straight back down means the step up didn't fit: wait longer next time
+        if (
+            quality_frames_since_upgrade is not None
+            and quality_frames_since_upgrade < quality_upgrade_wait
+        ):
+            quality_upgrade_wait = min(quality_upgrade_wait * 2, QUALITY_MAX_UPGRADE_WAIT)
+        quality_frames_since_upgrade = None
+        change_quality_level(quality_level + 1)
+        note_input("quality", quality_level)
+    elif quality_under_frames >= quality_upgrade_wait and quality_level > 0:
+        quality_frames_since_upgrade = 0
+        change_quality_level(quality_level - 1)
+        note_input("quality", quality_level)
+
+
+def run_frame(dt_ms, present=True):
+    """
+    Run one frame of the main loop. With present=False the frame is only
+    rendered into scene_surface (headless runs), or with --renderer sdl2
+    only queued until scene_image() asks for it.
+    """
+    global last_dt_ms, sim_time_ms, frame_step, critical_overlay_drawn
+    last_dt_ms = dt_ms  # store for UI effects like typewriter
+    sim_time_ms += dt_ms
+    frame_step = min(dt_ms * SIM_FPS / 1000.0, MAX_FRAME_STEP)
+    advance_theme_fade()
+
+    begin_frame_timing()
+
+    handle_events()
+    end_stage("events")
+
+    # Effective speed (base * slow-mo multiplier)
+    effective_speed = base_speed_factor * (0.3 if slow_mo else 1.0)
+
+    update_trace(dt_ms)
+    end_stage("trace")
+
+    critical_overlay_drawn = critical_error_timer > 0
 
-    # Occasionally spawn a special word rain
-    if random.random() > 0.998:
+    if paused:
+        # Nothing would change on screen: skip rendering entirely
+        if present and is_idle():
+            capture_frame()
+            end_stage("capture")
+            record_frame_profile(dt_ms)
+            return
+        if sdl_renderer is not None:
+            queue_critical_error_overlay()
+        else:
+            apply_critical_error_overlay(scene_surface)
+        end_stage("critical_error")
+        if present:
+            present_frame(scene_changed=critical_overlay_drawn)
+        capture_frame()
+        end_stage("capture")
+        record_frame_profile(dt_ms)
+        return
+
+    if render_processes:
+        # The render processes draw everything up to the overlay
+        composite_rain(dt_ms, effective_speed)
+        end_stage("rain")
+    elif sdl_renderer is not None:
+        # Only the draws are queued; present_frame() renders them
+        queue_rendered_rain(dt_ms, effective_speed)
+        end_stage("rain")
+        queue_critical_error_overlay()
+        end_stage("critical_error")
+    else:
+        clear_scene()
+        end_stage("clear")
+
+        draw_rain(effective_speed)
+        end_stage("rain")
+
+        # Occasionally spawn a special word rain
+        if word_rain_count() < max_word_rains and word_rng.random() > chance_threshold(0.002):
+            spawn_word_rain()
+        drain_text_feed(dt_ms)
+
+        # Draw and update word rains on top of normal rain
+        draw_word_rains(scene_surface, effective_speed)
+        end_stage("word_rains")
+
+        # Apply critical error overlay (if active)
+        apply_critical_error_overlay(scene_surface)
+        end_stage("critical_error")
+
+    if present:
+        present_frame()
+    update_quality(sum(frame_stage_ms.values()) - frame_stage_ms["flip"])
+    capture_frame()
+    end_stage("capture")
+    record_frame_profile(dt_ms)
+
+
+def run_headless(frames, screenshot=None):
+    """
+    Render a fixed number of frames offscreen at a steady --fps timestep;
+    frames=None runs until the replay log ends.
+    """
+    dt_ms = 1000.0 / (config.fps or SIM_FPS)
+    frame = 0
+    while frames is None or frame < frames:
+        frame += 1
+        if not running:
+            break
+        frame_dt_ms = begin_input_frame("main", dt_ms)
+        if frame_dt_ms is None:
+            break  # end of the replay
+        run_frame(frame_dt_ms, present=False)
+        finish_startup()
+
+    if screenshot:
+        pygame.image.save(scene_image(), screenshot)
+
+
+# ==== TILED RENDERING ====
+# With --tiles N a video wall is rendered by N worker processes, one per
+# vertical tile of the --resolution canvas. This process is the coordinator:
+# it runs the column, trail and word rain simulation (one seed, one clock)
+# and publishes every frame's state in shared memory; each worker draws the
+# columns and word rains overlapping its tile, in wall coordinates shifted by
+# the tile's x, so glyphs crossing a boundary line up. A pipe per worker is
+# the frame barrier: the coordinator sends the frame once its state is
+# published and waits until every tile answers that it is drawn (with any
+# key pressed in its window). Unlike a shared lock, a pipe can't be left
+# held by a process that died. Tiles show in their own window, placed side by
+# side, or write into a shared framebuffer of the whole wall (headless runs
+# always do, so --screenshot can save it). The wall runs at a fixed quality
+# level and render scale 1, without shake, critical errors or the UI.
+# Framebuffers hold RGBX pixels, which pygame.image.frombuffer can wrap in
+# place. A tile draws into a display-format surface first (glyph blits into
+# a foreign pixel format are far slower) and then copies it over.
+TILE_START_TIMEOUT = 60.0  # seconds the workers may take to start up
+TILE_FRAME_TIMEOUT = 10.0  # seconds a frame may take before the wall gives up
+TILE_ROLE_CODES = {role: code for code, role in enumerate(HEAD_ROLES)}
+
+
+def tile_state_layout(column_count, row_count, buffer_count=1, tile_count=1):
+    """(name, dtype, shape) of every array in the shared wall state."""
+    return (
+        ("frame", np.int64, (1,)),  # number of the frame published last
+        ("theme", np.int64, (1,)),
+        # Last frame each tile finished in each framebuffer
+        ("sequence", np.int64, (buffer_count, tile_count)),
+        ("x_positions", np.int32, (column_count,)),
+        ("ys", np.int32, (column_count,)),
+        ("codes", np.int64, (column_count,)),
+        ("roles", np.int8, (column_count,)),
+        ("trail_rows", np.int64, (column_count,)),
+        ("grid_codes", np.int64, (column_count, row_count)),
+        ("word_active", np.bool_, (WORD_RAIN_CAPACITY,)),
+        ("word_x", np.int32, (WORD_RAIN_CAPACITY,)),
+        ("word_y", np.float64, (WORD_RAIN_CAPACITY,)),
+        ("word_order", np.int64, (WORD_RAIN_CAPACITY,)),
+        ("word_text", f"<U{WORD_MAX_CHARS}", (WORD_RAIN_CAPACITY,)),
+        ("word_flash", np.bool_, (WORD_RAIN_CAPACITY, WORD_MAX_CHARS)),
+    )
+
+
+def tile_state_slots(layout):
+    """(name, dtype, shape, offset) of every state array, 8-byte aligned, and the total size."""
+    slots = []
+    offset = 0
+    for name, dtype, shape in layout:
+        dtype = np.dtype(dtype)
+        slots.append((name, dtype, shape, offset))
+        offset += -(-dtype.itemsize * math.prod(shape) // 8) * 8
+    return slots, offset
+
+
+def tile_state_views(buffer, layout):
+    """NumPy views of the wall state arrays in a shared memory buffer."""
+    slots, _ = tile_state_slots(layout)
+    return {
+        name: np.ndarray(shape, dtype, buffer, offset) for name, dtype, shape, offset in slots
+    }
+
+
+def tile_bounds(width, tile_count):
+    """(x0, x1) of every tile across a canvas width pixels wide."""
+    bounds = [width * k // tile_count for k in range(tile_count + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def create_tile_state(tile_count, buffer_count):
+    """Shared memory holding the wall state for the current columns, and its views."""
+    layout = tile_state_layout(columns, grid_rows, buffer_count, tile_count)
+    memory = shared_memory.SharedMemory(create=True, size=tile_state_slots(layout)[1])
+    state = tile_state_views(memory.buf, layout)
+    state["sequence"][:] = -1
+    state["x_positions"][:] = x_positions
+    return layout, memory, state
+
+
+def start_tile_workers(size, tile_count, layout, state_name, framebuffer_names, windows=False):
+    """
+    Spawn a worker for each of tile_count tiles of a size canvas, drawing
+    into the framebuffers or into windows of their own. Returns (workers, pipes).
+    """
+    # spawn, not fork: every worker starts its own SDL from scratch
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    pipes = []
+    for index, (x0, x1) in enumerate(tile_bounds(size[0], tile_count)):
+        pipe, worker_pipe = context.Pipe()
+        worker = context.Process(
+            target=tile_worker,
+            args=(
+                index, x0, x1, size, layout, trail_length, state_name,
+                None if windows else framebuffer_names, worker_pipe,
+            ),
+            name=f"tile-{index + 1}",
+            daemon=True,
+        )
+        worker.start()
+        worker_pipe.close()
+        workers.append(worker)
+        pipes.append(pipe)
+    return workers, pipes
+
+
+def stop_tile_workers(workers, pipes):
+    """Close the frame pipes, which ends the workers, and wait for them."""
+    for pipe in pipes:
+        pipe.close()
+    for worker in workers:
+        worker.join(TILE_FRAME_TIMEOUT)
+        if worker.is_alive():
+            worker.kill()  # SIGTERM would only queue a QUIT event
+
+
+def step_rain_frame(effective_speed, dt_ms):
+    """
+    Advance the rain and trail grid by one frame and spawn word rains, drawing
+    nothing. Random draws happen in run_frame's order, so the frame matches a
+    single process drawing it with Surface blits.
+
+    Returns (ys, codes, chars, roles, active, flashing): the heads and the
+    word rains to draw. The caller moves the words on with move_word_rains()
+    once it has used their positions.
+    """
+    ys, rows, codes, chars, roles = step_rain_columns(effective_speed)
+    advance_trail_grid(rows, codes)
+    if word_rain_count() < max_word_rains and word_rng.random() > chance_threshold(0.002):
         spawn_word_rain()
+    drain_text_feed(dt_ms)
+    active = active_word_rains()
+    return ys, codes, chars, roles, active, roll_word_flashes(active)
+
+
+def publish_rain_frame(state, effective_speed, dt_ms):
+    """Advance the rain and word rains by one frame and publish it to state."""
+    ys, codes, _, roles, active, flashing = step_rain_frame(effective_speed, dt_ms)
+
+    state["theme"][0] = theme_index
+    state["ys"][:] = ys
+    state["codes"][:] = codes
+    state["roles"][:] = [TILE_ROLE_CODES[role] for role in roles]
+    state["trail_rows"][:] = trail_rows
+    state["grid_codes"][:] = grid_codes
+    # Words are drawn where they were before this frame's move
+    state["word_active"][:] = word_rain_active
+    state["word_x"][:] = word_rain_x
+    state["word_y"][:] = word_rain_y
+    state["word_order"][:] = word_rain_order
+    state["word_text"][:] = word_rain_text
+    state["word_flash"][:] = False
+    for slot, letters in zip(active.tolist(), flashing):
+        state["word_flash"][slot, letters] = True
+    move_word_rains(active, effective_speed)
+
+
+def handle_tile_key(key):
+    """Apply a key pressed in one of the tile windows."""
+    global running, paused, base_speed_factor, slow_mo, binary_mode
+    if key == pygame.K_ESCAPE:
+        running = False
+    elif key == pygame.K_SPACE:
+        paused = not paused
+    elif key == pygame.K_UP:
+        base_speed_factor = min(base_speed_factor + 0.1, 3.0)
+    elif key == pygame.K_DOWN:
+        base_speed_factor = max(base_speed_factor - 0.1, 0.2)
+    elif key == pygame.K_b:
+        slow_mo = not slow_mo
+    elif key == pygame.K_n:
+        binary_mode = not binary_mode
+
+
+def run_tiled(tile_count, output, frames=0, screenshot=None):
+    """Coordinate a wall of tile_count worker processes; returns an exit status."""
+    global WIDTH, HEIGHT, SCENE_WIDTH, SCENE_HEIGHT, FONT_SIZE
+    global last_dt_ms, sim_time_ms, frame_step
+
+    WIDTH, HEIGHT = config.resolution or DEFAULT_WINDOW_SIZE
+    SCENE_WIDTH, SCENE_HEIGHT = WIDTH, HEIGHT
+    FONT_SIZE = BASE_FONT_SIZE
+    build_rain_columns()
+    clear_word_rains()
+    reset_trail_grid()
+
+    layout, state_memory, state = create_tile_state(tile_count, 1)
+    framebuffer = None
+    if output == "shared":
+        framebuffer = shared_memory.SharedMemory(create=True, size=WIDTH * HEIGHT * 4)
+        if not config.headless:
+            print(
+                f"tiles: wall framebuffer in shared memory '{framebuffer.name}' "
+                f"({WIDTH}x{HEIGHT}, RGBX)",
+                file=sys.stderr,
+            )
+    workers, pipes = start_tile_workers(
+        (WIDTH, HEIGHT), tile_count, layout, state_memory.name,
+        [framebuffer.name] if framebuffer else [], windows=framebuffer is None,
+    )
+    startup_mark("tiles started")
 
-    # Draw and update word rains on top of normal rain
-    draw_word_rains(scene_surface, effective_speed)
+    status = 0
+    dt_ms = 1000.0 / (config.fps or SIM_FPS)
+    timeout = TILE_START_TIMEOUT
+    frame = 0
+    try:
+        while running and (not frames or frame < frames):
+            frame_dt_ms = dt_ms if config.headless else clock.tick(config.fps)
+            last_dt_ms = frame_dt_ms
+            sim_time_ms += frame_dt_ms
+            frame_step = min(frame_dt_ms * SIM_FPS / 1000.0, MAX_FRAME_STEP)
+            if not paused:
+                publish_rain_frame(state, base_speed_factor * (0.3 if slow_mo else 1.0), frame_dt_ms)
+            state["frame"][0] = frame
+            for pipe in pipes:
+                pipe.send(frame)
+            for key in wait_for_tiles(pipes, workers, timeout):
+                handle_tile_key(key)
+            timeout = TILE_FRAME_TIMEOUT
+            finish_startup()
+            frame += 1
+        for pipe in pipes:
+            pipe.send(None)
+        if screenshot and framebuffer is not None:
+            pygame.image.save(pygame.image.frombuffer(framebuffer.buf, (WIDTH, HEIGHT), "RGBX"), screenshot)
+        elif screenshot:
+            print("tiles: --screenshot needs --tile-output shared", file=sys.stderr)
+    except (TimeoutError, OSError) as e:
+        print(f"tiles: {e}, shutting the wall down", file=sys.stderr)
+        status = 1
+    finally:
+        # On any error too: workers left waiting on open pipes would hang
+        # multiprocessing's exit handler, and the shared memory would leak
+        stop_tile_workers(workers, pipes)
+        # The views must go before the shared memory can close
+        state.clear()
+        state_memory.close()
+        state_memory.unlink()
+        if framebuffer is not None:
+            framebuffer.close()
+            framebuffer.unlink()
+    return status
+
+
+def wait_for_tiles(pipes, workers, timeout):
+    """
+    Wait until every tile answers that its frame is drawn; returns the keys
+    pressed in the tile windows. Raises TimeoutError if a tile takes longer
+    than timeout seconds and OSError if a worker died.
+    """
+    keys = []
+    pending = dict(zip(pipes, workers))
+    deadline = time.perf_counter() + timeout
+    while pending:
+        ready = multiprocessing.connection.wait(
+            list(pending) + [worker.sentinel for worker in pending.values()],
+            max(0.0, deadline - time.perf_counter()),
+        )
+        if not ready:
+            names = ", ".join(worker.name for worker in pending.values())
+            raise TimeoutError(f"{names} took longer than {timeout:.0f} s")
+        for pipe, worker in list(pending.items()):
+            if pipe in ready:
+                try:
+                    keys.append(pipe.recv())
+                except EOFError:
+                    raise OSError(f"{worker.name} exited") from None
+                del pending[pipe]
+            elif worker.sentinel in ready:
+                raise OSError(f"{worker.name} exited with code {worker.exitcode}")
+    return keys
+
+
+def tile_worker(index, x0, x1, wall_size, layout, trail_len, state_name, framebuffer_names, pipe):
+    """
+    Render one tile of the wall, x0 <= x < x1, in a worker process until the
+    coordinator quits: in a window of its own if framebuffer_names is None,
+    otherwise frame n goes into framebuffer n % len(framebuffer_names). Only
+    the columns overlapping the tile are kept, as this process's own rain
+    columns and trail strips.
+    """
+    global SCENE_WIDTH, SCENE_HEIGHT, trail_length, columns, x_positions
+    global grid_rows, grid_codes, grid_levels, trail_rows, trail_strips, word_rain_text
+
+    wall_height = wall_size[1]
+    offscreen = framebuffer_names is not None
+    if not offscreen:
+        os.environ["SDL_VIDEO_WINDOW_POS"] = f"{x0},0"
+    init_display(offscreen, (x1 - x0, wall_height))
+    pygame.display.set_caption(f"VisionBreaker: Neurogrid Terminal | tile {index + 1}")
+    SCENE_WIDTH, SCENE_HEIGHT = wall_size
+    trail_length = trail_len
+    refresh_glyph_atlas()
+
+    state_memory = shared_memory.SharedMemory(name=state_name)
+    state = tile_state_views(state_memory.buf, layout)
+    framebuffers = [shared_memory.SharedMemory(name=name) for name in framebuffer_names or ()]
+    targets = [
+        pygame.image.frombuffer(buffer.buf, wall_size, "RGBX").subsurface((x0, 0, x1 - x0, wall_height))
+        for buffer in framebuffers
+    ]
+    surface = make_scene_layer((x1 - x0, wall_height)) if offscreen else screen
+
+    # The columns this tile draws; a column starting left of x0 still reaches into it
+    wall_x = state["x_positions"]
+    tile_columns = np.flatnonzero((wall_x + max(FONT_SIZE, glyph_box[0]) > x0) & (wall_x < x1))
+    columns = len(tile_columns)
+    x_positions = wall_x[tile_columns]
+    grid_rows = state["grid_codes"].shape[1]
+    # Nothing drawn yet: the first frame redraws every trail cell
+    grid_codes = np.full((columns, grid_rows), -1, dtype=np.int64)
+    grid_levels = np.full((columns, grid_rows), -1, dtype=np.int8)
+    trail_rows = np.full(columns, -grid_rows - trail_length, dtype=np.int64)
+    strip_size = (FONT_SIZE, trail_length * FONT_SIZE)
+    trail_strips = [make_scene_layer(strip_size, transparent=True) for _ in range(columns)]
+    word_rain_text = [""] * WORD_RAIN_CAPACITY
 
-    # Apply critical error overlay (if active)
-    apply_critical_error_overlay(scene_surface)
+    try:
+        # None (or a closed pipe, if the coordinator died) ends the wall
+        while (frame := pipe.recv()) is not None:
+            if state["theme"][0] != theme_index:
+                set_theme(int(state["theme"][0]))
+            sync_trail_grid(state["trail_rows"][tile_columns], state["grid_codes"][tile_columns])
+            draw_tile(surface, state, tile_columns, x0)
+            if targets:
+                buffer = frame % len(targets)
+                targets[buffer].blit(surface, (0, 0))
+                state["sequence"][buffer, index] = frame
+            else:
+                pygame.display.flip()
+            # SDL turns SIGTERM into a QUIT event, so this also stops an offscreen wall
+            pipe.send(tile_window_key())
+    except (EOFError, OSError):
+        pass  # the coordinator is gone
 
-    # Camera shake on the rain scene only
-    offset_x, offset_y = get_shake_offset()
-    screen.fill(current_theme["bg"])
-    screen.blit(scene_surface, (offset_x, offset_y))
+    del wall_x, targets
+    state.clear()
+    state_memory.close()
+    for buffer in framebuffers:
+        buffer.close()
+    pygame.quit()
 
-    # Draw UI overlay after shake so it stays fixed
+
+def sync_trail_grid(rows, codes):
+    """
+    Take over the coordinator's trail grid for this tile's columns and
+    redraw the cells that changed: every cell a head entered (a ring slot
+    can be reused by a cell with the same glyph), every other mutation and
+    every cell that dropped a fade level.
+    """
+    global trail_rows
+    shift = rows - trail_rows
+    shift = np.where((shift < 0) | (shift > trail_length), trail_length, shift)
+    window, on_grid = trail_window(rows)
+    cols, cells = np.nonzero(on_grid)
+    grid_r = window[cols, cells]
+    levels = trail_levels(cells)
+    changed = (
+        (cells < shift[cols])
+        | (grid_codes[cols, grid_r] != codes[cols, grid_r])
+        | (grid_levels[cols, grid_r] != levels)
+    )
+    grid_codes[cols, grid_r] = codes[cols, grid_r]
+    grid_levels[cols, grid_r] = levels
+    trail_rows = rows
+    draw_grid_cells(cols[changed], grid_r[changed])
+
+
+def draw_tile(surface, state, tile_columns, x0):
+    """Draw one published wall frame into a tile whose left edge is at wall x0."""
+    surface.fill(current_theme["bg"])
+    ys = state["ys"][tile_columns].tolist()
+    chars = [char_pool[code] for code in state["codes"][tile_columns].tolist()]
+    roles = [HEAD_ROLES[code] for code in state["roles"][tile_columns].tolist()]
+    draw_rain_strip((x0, None, surface), glyph_atlas, np.arange(columns), None, ys, chars, roles)
+
+    word_rain_active[:] = state["word_active"]
+    word_rain_x[:] = state["word_x"]
+    word_rain_y[:] = state["word_y"]
+    word_rain_order[:] = state["word_order"]
+    word_rain_text[:] = state["word_text"].tolist()
+    active = active_word_rains()
+    flashing = [np.flatnonzero(state["word_flash"][slot]).tolist() for slot in active.tolist()]
+    blit_word_rains(surface, active, flashing, x0)
+
+
+def tile_window_key():
+    """The last wall key pressed in this tile's window this frame, or 0."""
+    key = 0
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            key = pygame.K_ESCAPE
+        elif event.type == pygame.KEYDOWN and event.key in (
+            pygame.K_ESCAPE, pygame.K_SPACE, pygame.K_UP, pygame.K_DOWN, pygame.K_b, pygame.K_n,
+        ):
+            key = event.key
+    return key
+
+
+# ==== PROCESS COMPOSITOR ====
+# With --render-processes N the rain and word rains are drawn by N tile
+# workers (see TILED RENDERING) into shared-memory framebuffers, and this
+# process keeps only the simulation, events, UI and presentation. There are
+# two framebuffers: while the workers draw the next frame into one, the
+# other is on screen as scene_surface, wrapped in place with
+# pygame.image.frombuffer. Each tile stamps the frame number into its
+# sequence slot when done, and a buffer is only swapped in once every tile
+# has stamped it, so a half-drawn frame is never shown. If the workers fall
+# behind, the window keeps presenting the last finished frame with a live
+# UI and the rain simulation waits for them. Headless runs wait every frame.
+COMPOSITOR_BUFFERS = 2
+
+compositor_workers = []
+compositor_pipes = []
+compositor_memory = []    # the state block and the framebuffers
+compositor_state = {}     # views of the wall state (TILED RENDERING)
+compositor_frames = []    # frombuffer surfaces of the framebuffers
+compositor_pending = None  # frame the workers are drawing, None if idle
+compositor_next = 0       # number of the next frame to dispatch
+compositor_dt_ms = 0.0    # time since the rain was last advanced
+compositor_steps = [1.0] * COMPOSITOR_BUFFERS  # frame_step each framebuffer's frame advanced by
+compositor_timeout = TILE_START_TIMEOUT
+
+
+def start_compositor():
+    """(Re)start the render processes for the current scene and columns."""
+    global compositor_workers, compositor_pipes, compositor_memory, compositor_state
+    global compositor_frames, compositor_pending, compositor_next, compositor_dt_ms
+    global compositor_timeout, scene_surface, scene_view
+
+    stop_compositor()
+    layout, state_memory, compositor_state = create_tile_state(render_processes, COMPOSITOR_BUFFERS)
+    size = (SCENE_WIDTH, SCENE_HEIGHT)
+    buffers = [
+        shared_memory.SharedMemory(create=True, size=SCENE_WIDTH * SCENE_HEIGHT * 4)
+        for _ in range(COMPOSITOR_BUFFERS)
+    ]
+    compositor_memory = [state_memory] + buffers
+    compositor_frames = [pygame.image.frombuffer(buffer.buf, size, "RGBX") for buffer in buffers]
+    compositor_workers, compositor_pipes = start_tile_workers(
+        size, render_processes, layout, state_memory.name, [buffer.name for buffer in buffers]
+    )
+    compositor_pending = None
+    compositor_next = 0
+    compositor_dt_ms = 0.0
+    compositor_timeout = TILE_START_TIMEOUT
+
+    # Background until the first frame is in
+    scene_surface = scene_view = compositor_frames[-1]
+    scene_surface.fill(current_theme["bg"])
+
+
+def stop_compositor():
+    """Stop the render processes and free their shared memory."""
+    global compositor_workers, compositor_pipes, compositor_memory, compositor_frames
+    global scene_surface, scene_view
+    if not compositor_memory:
+        return
+    stop_tile_workers(compositor_workers, compositor_pipes)
+    # Nothing may still point into the buffers when they close
+    if any(scene_surface is frame for frame in compositor_frames):
+        scene_surface = scene_view = None
+    compositor_state.clear()
+    compositor_frames = []
+    for memory in compositor_memory:
+        memory.close()
+        memory.unlink()
+    compositor_workers, compositor_pipes, compositor_memory = [], [], []
+
+
+def composite_rain(dt_ms, effective_speed):
+    """
+    Swap in the frame the render processes finished, with the critical error
+    overlay drawn on it, and hand them the next one.
+    """
+    global compositor_dt_ms, frame_step
+    compositor_dt_ms += dt_ms
+    try:
+        swapped = collect_composited_frame(wait=False)
+        if compositor_pending is None:
+            dispatch_composited_frame(effective_speed)
+            if headless:
+                swapped = collect_composited_frame(wait=True)
+    except (TimeoutError, OSError) as e:
+        fall_back_from_compositor(e)
+        return
+    if swapped:
+        # Once per finished frame, timed by the step that frame advanced
+        display_step = frame_step
+        frame_step = compositor_steps[compositor_frames.index(scene_surface)]
+        apply_critical_error_overlay(scene_surface)
+        frame_step = display_step
+
+
+def dispatch_composited_frame(effective_speed):
+    """Advance the rain by the time since its last step and send the workers the new frame."""
+    global compositor_pending, compositor_next, compositor_dt_ms, frame_step
+    display_step = frame_step
+    frame_step = min(compositor_dt_ms * SIM_FPS / 1000.0, MAX_FRAME_STEP)
+    publish_rain_frame(compositor_state, effective_speed, compositor_dt_ms)
+    compositor_steps[compositor_next % COMPOSITOR_BUFFERS] = frame_step
+    frame_step = display_step
+    compositor_dt_ms = 0.0
+    compositor_state["frame"][0] = compositor_next
+    for pipe in compositor_pipes:
+        pipe.send(compositor_next)
+    compositor_pending = compositor_next
+    compositor_next += 1
+
+
+def collect_composited_frame(wait):
+    """
+    If every tile has finished the pending frame (or after waiting for it),
+    show its framebuffer; returns whether it did.
+    """
+    global compositor_pending, compositor_timeout, scene_surface, scene_view
+    if compositor_pending is None:
+        return False
+    buffer = compositor_pending % COMPOSITOR_BUFFERS
+    if not wait and (compositor_state["sequence"][buffer] != compositor_pending).any():
+        for worker in compositor_workers:
+            if not worker.is_alive():
+                raise OSError(f"{worker.name} exited with code {worker.exitcode}")
+        return False
+    wait_for_tiles(compositor_pipes, compositor_workers, compositor_timeout)
+    compositor_timeout = TILE_FRAME_TIMEOUT
+    scene_surface = scene_view = compositor_frames[buffer]
+    compositor_pending = None
+    return True
+
+
+def fall_back_from_compositor(error):
+    """Stop using render processes after one failed; the rain is drawn here again."""
+    global render_processes
+    print(f"render processes: {error}; drawing the rain in this process", file=sys.stderr)
+    render_processes = 0
+    stop_compositor()
+    init_surfaces()
+
+
+# ==== SDL2 RENDERER ====
+# With --renderer sdl2 frames are drawn by an SDL2 Renderer (pygame._sdl2)
+# instead of Surface blits. Every glyph is kept on the renderer as one white
+# texture and drawn as a textured quad tinted with the texture's color
+# modulation, so theme changes re-render nothing. The frame loop only
+# queues the frame's draws (scene_draws, rendered_glitch_lines) and
+# present_frame() renders them with the camera shake as the viewport
+# offset. The boot screen and UI are still drawn with pygame, into screen
+# (an offscreen Surface here) and uploaded to ui_texture, only where they
+# changed. An accelerated renderer is used where SDL has one, otherwise
+# SDL's software renderer, which also runs headless on the dummy driver.
+RENDERER_BLEND = 1  # SDL_BLENDMODE_BLEND
+RENDERER_WHITE = (255, 255, 255)
+RENDERER_CLEAR = (0, 0, 0, 0)
+
+renderer_backend = "surface"  # --renderer
+sdl_video = None          # pygame._sdl2.video, imported with the first window
+sdl_window = None
+sdl_renderer = None
+renderer_name = None      # "accelerated" or "software"
+glyph_textures = {}       # char -> (white glyph texture, its trail cell area)
+glyph_texture_extras = deque()
+trail_textures = []       # char_pool index -> glyph_textures entry
+banner_texture = None     # white SYSTEM FAILURE banner
+ui_texture = None         # screen as uploaded, the UI over the scene
+ui_texture_rects = []     # regions of ui_texture drawn to last frame
+rendered_screen = None    # read back presented frame for --record-source screen
+scene_draws = []          # (texture, color, area, dest) of the queued scene
+rendered_glitch_lines = None  # queued critical error glitch lines, None if off
+
+
+def open_renderer_window():
+    """
+    Size the renderer's window to WIDTH x HEIGHT, opening it and the renderer
+    on first use; returns the offscreen Surface the boot screen and UI draw on.
+    """
+    global sdl_video, sdl_window, sdl_renderer, renderer_name, ui_texture, rendered_screen
+    if sdl_window is None:
+        try:
+            from pygame._sdl2 import video
+        except ImportError as e:
+            raise SystemExit(f"--renderer sdl2 needs pygame 2 with SDL2 support: {e}")
+        sdl_video = video
+        sdl_window = video.Window("VisionBreaker: Neurogrid Terminal", size=(WIDTH, HEIGHT))
+        sdl_renderer, renderer_name = create_renderer(sdl_window)
+        print(f"SDL2 renderer: {renderer_name}")
+
+    if fullscreen and not headless:
+        sdl_window.size = (WIDTH, HEIGHT)
+        sdl_window.set_fullscreen(desktop=True)
+    else:
+        sdl_window.set_windowed()
+        sdl_window.size = (WIDTH, HEIGHT)
+
+    surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    ui_texture = sdl_video.Texture.from_surface(sdl_renderer, surface)
+    ui_texture.blend_mode = RENDERER_BLEND
+    rendered_screen = pygame.Surface((WIDTH, HEIGHT))
+    return surface
+
+
+def create_renderer(window):
+    """An accelerated renderer for window if SDL has one, else the software one, and its name."""
+    vsync = config.vsync and not headless
+    try:
+        return sdl_video.Renderer(window, accelerated=1, vsync=vsync), "accelerated"
+    except sdl_video.error:
+        pass
+    try:
+        return sdl_video.Renderer(window, accelerated=0, vsync=vsync), "software"
+    except sdl_video.error as e:
+        raise SystemExit(f"--renderer sdl2: no renderer available: {e}")
+
+
+def close_renderer():
+    """Free every texture, then the renderer and its window."""
+    global sdl_window, sdl_renderer, banner_texture, ui_texture, rendered_glitch_lines
+    if sdl_window is None:
+        return
+    scene_draws.clear()
+    rendered_glitch_lines = None
+    glyph_textures.clear()
+    glyph_texture_extras.clear()
+    trail_textures.clear()
+    banner_texture = ui_texture = None
+    sdl_renderer = None
+    sdl_window.destroy()
+    sdl_window = None
+
+
+def init_renderer_scene():
+    """Upload the glyph and banner textures for the current fonts and clear the UI layer."""
+    global banner_texture, trail_textures, ui_texture_rects
+    scene_draws.clear()
+    glyph_textures.clear()
+    glyph_texture_extras.clear()
+    for ch in set(char_pool + "01" + WORD_RAIN_ALPHABET):
+        glyph_textures[ch] = render_glyph_texture(ch)
+    trail_textures = [glyph_textures[ch] for ch in char_pool]
+    banner_texture = sdl_video.Texture.from_surface(
+        sdl_renderer, big_font.render("SYSTEM FAILURE", True, RENDERER_WHITE)
+    )
+
+    screen.fill(RENDERER_CLEAR)
+    ui_texture.update(screen)
+    ui_texture_rects = []
+
+
+def render_glyph_texture(ch):
+    """
+    A white glyph texture for ch, and the area of it a trail cell shows
+    (clipped to the cell so tall glyphs don't bleed into the next one).
+    """
+    glyph = font.render(ch, True, RENDERER_WHITE)
+    area = (0, 0, min(glyph.get_width(), FONT_SIZE), min(glyph.get_height(), FONT_SIZE))
+    return sdl_video.Texture.from_surface(sdl_renderer, glyph), area
+
+
+def get_glyph_texture(ch):
+    """Return the glyph_textures entry for ch, uploading it on first use."""
+    entry = glyph_textures.get(ch)
+    if entry is None:
+        # Same bound as the atlas extras (see GLYPH_EXTRA_LIMIT)
+        entry = render_glyph_texture(ch)
+        glyph_textures[ch] = entry
+        glyph_texture_extras.append(ch)
+        if len(glyph_texture_extras) > GLYPH_EXTRA_LIMIT:
+            del glyph_textures[glyph_texture_extras.popleft()]
+    return entry
+
+
+def queue_rendered_rain(dt_ms, effective_speed):
+    """
+    Advance the rain and word rains and queue their draws, in the order the
+    Surface path blits them: trails, heads, then words oldest first.
+    """
+    global scene_draws
+    ys, codes, chars, roles, active, flashing = step_rain_frame(effective_speed, dt_ms)
+
+    # Every trail cell on the grid; the grid ends just below the scene
+    window, on_grid = trail_window(trail_rows)
+    cols, cells = np.nonzero(on_grid)
+    rows = window[cols, cells]
+    trail_colors = [current_theme[role] for role in TRAIL_ROLES]
+    draws = [
+        (trail_textures[code][0], trail_colors[level], trail_textures[code][1], (x, y))
+        for code, level, x, y in zip(
+            grid_codes[cols, rows].tolist(),
+            grid_levels[cols, rows].tolist(),
+            x_positions[cols].tolist(),
+            (rows * FONT_SIZE).tolist(),
+        )
+    ]
+    draws += [
+        (glyph_textures[char][0], current_theme[role], None, (x, y))
+        for x, y, char, role in zip(x_positions.tolist(), ys, chars, roles)
+    ]
+    draws += word_rain_draws(active, flashing)
+    scene_draws = draws
+    move_word_rains(active, effective_speed)
+
+
+def word_rain_draws(active, flashing):
+    """Draws of the active word rains' letters, culled to the scene, flashing letters on top."""
+    bright = current_theme["bright"]
+    flash = current_theme["flash"]
+    glyph_h = glyph_box[1]
+    draws = []
+    for slot, x, y, flash_letters in zip(
+        active.tolist(), word_rain_x[active].tolist(), word_rain_y[active].tolist(), flashing
+    ):
+        y = int(y)
+        if x + glyph_box[0] <= 0 or x >= SCENE_WIDTH:
+            continue
+        text = word_rain_text[slot]
+        for idx, ch in enumerate(text):
+            top = y + idx * FONT_SIZE
+            if ch != " " and -glyph_h < top < SCENE_HEIGHT:
+                draws.append((get_glyph_texture(ch)[0], bright, None, (x, top)))
+        for idx in flash_letters:
+            top = y + idx * FONT_SIZE
+            if text[idx] != " " and -FONT_SIZE < top < SCENE_HEIGHT:
+                texture, area = get_glyph_texture(text[idx])
+                draws.append((texture, flash, area, (x, top)))
+    return draws
+
+
+def queue_critical_error_overlay():
+    """The renderer's apply_critical_error_overlay(): queue this frame's glitch lines."""
+    global rendered_glitch_lines
+    rendered_glitch_lines = next_glitch_lines()
+
+
+def draw_rendered_scene(offset_x=0, offset_y=0):
+    """Clear to the background and draw the queued scene and critical error overlay at an offset."""
+    sdl_renderer.draw_color = current_theme["bg"] + (255,)
+    sdl_renderer.clear()
+    sdl_renderer.set_viewport((offset_x, offset_y, SCENE_WIDTH, SCENE_HEIGHT))
+    for texture, color, area, dest in scene_draws:
+        texture.color = color
+        texture.draw(area, dest)
+
+    if rendered_glitch_lines is not None:
+        sdl_renderer.draw_blend_mode = RENDERER_BLEND
+        sdl_renderer.draw_color = ALERT_COLOR + (round(CRITICAL_TINT * 255),)
+        sdl_renderer.fill_rect((0, 0, SCENE_WIDTH, SCENE_HEIGHT))
+        sdl_renderer.draw_color = ALERT_COLOR + (255,)
+        for rect in rendered_glitch_lines:
+            sdl_renderer.fill_rect(rect)
+        banner_texture.color = current_theme["flash"]
+        banner_texture.draw(
+            None, banner_texture.get_rect(center=(SCENE_WIDTH // 2, SCENE_HEIGHT // 2))
+        )
+    sdl_renderer.set_viewport(None)
+
+
+def present_rendered_frame(offset_x, offset_y):
+    """Render the queued scene shaken by the offset, the UI over it, and present."""
+    global ui_texture_rects
+    draw_rendered_scene(offset_x, offset_y)
+    end_stage("shake")
+
+    # Only the regions the UI covered last frame or covers now are uploaded
+    for rect in ui_texture_rects:
+        screen.fill(RENDERER_CLEAR, rect)
     draw_ui_overlay(screen)
+    bounds = screen.get_rect()
+    for rect in ui_texture_rects + ui_rects:
+        rect = rect.clip(bounds)
+        if rect.width and rect.height:
+            ui_texture.update(screen.subsurface(rect), rect)
+    ui_texture_rects = list(ui_rects)
+    ui_texture.draw()
+    end_stage("ui")
+
+    if record_writer is not None and record_source == "screen":
+        sdl_renderer.to_surface(rendered_screen)
+    sdl_renderer.present()
+    end_stage("flip")
+
+
+def read_back_rendered_scene():
+    """Render the queued scene without shake or UI and read it back into scene_surface."""
+    draw_rendered_scene()
+    sdl_renderer.to_surface(scene_surface)
+    return scene_surface
+
+
+def screen_image():
+    """The presented screen with the UI, e.g. for recording."""
+    return rendered_screen if sdl_renderer is not None else screen
 
-    pygame.display.flip()
 
-pygame.quit()
+# ============= BOOTSTRAP =============
+def main():
+    global render_scale, smooth_upscale, quality_auto
+    global render_threads, palette_mode, render_processes, renderer_backend
+
+    if config.replay_input:
+        start_input_replay(config.replay_input, config)
+    elif config.record_input and config.seed is None:
+        # A recording can only be replayed with a known seed
+        config.seed = random.SystemRandom().randrange(2**32)
+    if config.seed is not None:
+        seed_random(config.seed)
+    quality_auto = config.quality == "auto"
+    if not quality_auto:
+        set_quality_knobs(QUALITY_NAMES.index(config.quality))
+    render_scale = min(1.0, max(0.1, config.render_scale))
+    smooth_upscale = config.smooth_scale
+    render_threads = max(1, config.render_threads)
+    palette_mode = config.palette
+    render_processes = max(0, config.render_processes)
+    if render_processes:
+        # Workers draw full-size RGB frames for the columns they were started with
+        render_scale = 1.0
+        render_threads = 1
+        palette_mode = False
+        if quality_auto:
+            quality_auto = False
+            set_quality_knobs(QUALITY_DEFAULT_LEVEL)
+    renderer_backend = config.renderer
+    if renderer_backend == "sdl2":
+        # The renderer draws the full-size scene itself, in true color
+        render_scale = 1.0
+        render_threads = 1
+        palette_mode = False
+        render_processes = 0
+    startup_mark("imports")
+    if config.tiles > 1:
+        # The wall runs the simulation only; it draws no UI and needs no scaling
+        quality_auto = False
+        if config.quality == "auto":
+            set_quality_knobs(QUALITY_DEFAULT_LEVEL)
+        if config.feed:
+            start_text_feed(config.feed, config.feed_follow, config.feed_rate, config.feed_queue)
+        output = "shared" if config.headless else config.tile_output
+        frames = config.frames or (HEADLESS_DEFAULT_FRAMES if config.headless else 0)
+        status = run_tiled(config.tiles, output, frames, config.screenshot)
+        stop_text_feed()
+        return status
+    if config.memory_log:
+        start_memory_instrumentation(config.memory_log, config.memory_interval)
+    start_render_pool()
+    try:
+        run_main()
+    finally:
+        # On any error too: render processes left waiting on open pipes would
+        # hang multiprocessing's exit handler, and their shared memory would leak
+        shut_down()
+    # Render farm jobs must be able to tell the video is incomplete
+    return 1 if record_failed else 0
+
+
+def run_main():
+    """Open the window, build the scene and run the frame loop until it ends."""
+    global dirty_rects_enabled
+
+    # A video is encoded at a fixed frame rate, so while recording frames are
+    # paced and simulated at that rate (SIM_FPS with --fps 0 or --vsync), not
+    # at whatever rate they happen to be drawn, to keep the video in real time
+    fps = config.fps or (SIM_FPS if config.record else 0)
+
+    init_display(config.headless, config.resolution, load_fonts=False)
+    startup_mark("window")
+    start_font_resolution()
+    if config.record_input:
+        start_input_recording(
+            config.record_input, argparse.Namespace(**dict(vars(config), resolution=(WIDTH, HEIGHT)))
+        )
+
+    if not config.headless:
+        # Audio and fonts load while the boot screen runs; the scene surfaces
+        # and glyph atlas are built once the player is through it
+        start_audio_loading()
+        show_boot_screen()
+    init_fonts()
+    init_surfaces()
+    startup_mark("surfaces")
+
+    if config.feed:
+        start_text_feed(config.feed, config.feed_follow, config.feed_rate, config.feed_queue)
+    if config.record:
+        # A headless screen never gets presented to
+        source = "scene" if config.headless else config.record_source
+        start_recording(config.record, source, config.record_buffers, fps, wait=config.headless)
+
+    dirty_rects_enabled = config.dirty_rects and not render_processes and renderer_backend == "surface"
+    if config.profile:
+        toggle_profiler()
+    if config.profile_log:
+        open_profile_log(config.profile_log)
+
+    if config.headless:
+        # A replay runs to the end of its log unless --frames stops it earlier
+        frames = config.frames or (None if config.replay_input else HEADLESS_DEFAULT_FRAMES)
+        run_headless(frames, config.screenshot)
+        return
+
+    frame_count = 0
+    while running:
+        # One tick per frame; --fps 0 (the default with --vsync) runs uncapped
+        ticked_ms = clock.tick(fps)
+        dt_ms = begin_input_frame("main", 1000.0 / fps if config.record else ticked_ms)
+        if dt_ms is None:
+            break  # end of the replay
+        run_frame(dt_ms)
+        finish_startup()
+
+        frame_count += 1
+        if config.frames and frame_count >= config.frames:
+            break
+
+    if config.screenshot:
+        pygame.image.save(scene_image(), config.screenshot)
+
+
+def shut_down():
+    """Stop every background thread and process, close the logs and quit pygame."""
+    close_profile_log()
+    stop_memory_instrumentation()
+    stop_input_recording()
+    stop_recording()
+    stop_render_pool()
+    stop_compositor()
+    close_renderer()
+    stop_text_feed()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    # Tile and render processes are spawned; frozen builds (the .exe) need this
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Reproducible frame-pipeline benchmark for VisionBreaker.
+
+Runs fixed numbers of frames through the real main-loop stages in headless
+mode with a fixed random seed, and reports per-stage and total frame time
+percentiles. Results can be saved as a baseline and compared on later runs:
+
+    python benchmark.py --save-baseline      # record benchmark_baseline.json
+    python benchmark.py                      # compare against it
+
+Timings depend on the machine, so the baseline is not committed; record one
+on the machine you compare on.
+"""
+import os
+import sys
+import json
+import argparse
+
+# Headless before VisionBreaker / SDL initialize anything
+os.environ["VISIONBREAKER_HEADLESS"] = "1"
+
+import numpy as np
+import VisionBreaker as vb
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+RESOLUTIONS = {
+    "default": vb.DEFAULT_WINDOW_SIZE,
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+}
+
+# name -> state applied on top of a clean free-mode session
+SCENARIOS = {
+    "normal": {},
+    "binary": {"binary_mode": True},
+    "slowmo": {"slow_mo": True},
+    "critical_error": {"critical_error": True},
+    "word_storm": {"word_rains": 40},
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+def reset_state(seed):
+    """Put the engine back into a clean free-mode session."""
+    vb.seed_random(seed)
+    vb.running = True
+    vb.paused = False
+    vb.binary_mode = False
+    vb.slow_mo = False
+    vb.base_speed_factor = 0.5
+    vb.game_mode = "free"
+    vb.hack_input_mode = False
+    vb.hack_buffer = ""
+    vb.critical_error_timer = 0
+    vb.shake_timer = 0
+    vb.theme_index = 0
+    vb.current_theme = vb.COLOR_THEMES[0]
+    # Fixed detail level so runs measure the same work
+    vb.quality_auto = False
+    vb.set_quality_knobs(vb.QUALITY_DEFAULT_LEVEL)
+
+
+def keep_scenario_active(setup):
+    """Re-arm effects that would otherwise expire during a long run."""
+    if setup.get("critical_error") and vb.critical_error_timer <= 0:
+        vb.trigger_critical_error()
+    target = setup.get("word_rains", 0)
+    while vb.word_rain_count() < target:
+        vb.spawn_word_rain()
+
+
+def run_scenario(resolution, setup, frames, warmup, seed):
+    """Run one scenario and return {stage: [ms per frame]} including 'total'."""
+    reset_state(seed)
+    vb.init_display(offscreen=True, resolution=resolution)
+    vb.init_surfaces()
+    vb.binary_mode = setup.get("binary_mode", False)
+    vb.slow_mo = setup.get("slow_mo", False)
+
+    samples = {stage: [] for stage in vb.FRAME_STAGES + ("total",)}
+    dt_ms = 1000.0 / vb.SIM_FPS
+    for frame in range(warmup + frames):
+        keep_scenario_active(setup)
+        vb.run_frame(dt_ms)
+        if frame < warmup:
+            continue
+        total = 0.0
+        for stage in vb.FRAME_STAGES:
+            ms = vb.frame_stage_ms[stage]
+            samples[stage].append(ms)
+            total += ms
+        samples["total"].append(total)
+    return samples
+
+
+def summarize(samples):
+    """Reduce raw samples to {stage: {"p50": ms, "p95": ms, "p99": ms}}."""
+    summary = {}
+    for stage, values in samples.items():
+        arr = np.asarray(values)
+        summary[stage] = {f"p{p}": round(float(np.percentile(arr, p)), 3) for p in PERCENTILES}
+    return summary
+
+
+def print_summary(name, summary, baseline=None):
+    """
+    Print one scenario's stage table, with deltas against the baseline if
+    given; stages the baseline has no entry for are marked as such.
+    """
+    print(f"\n== {name} ==")
+    header = f"{'stage':<16}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    if baseline:
+        header += f"{'base p50':>11}{'delta':>9}"
+    print(header)
+    for stage, stats in summary.items():
+        line = f"{stage:<16}" + "".join(f"{stats[f'p{p}']:>10.3f}" for p in PERCENTILES)
+        if baseline and stage in baseline:
+            base = baseline[stage]["p50"]
+            delta = (stats["p50"] - base) / base * 100.0 if base > 0 else 0.0
+            line += f"{base:>11.3f}{delta:>+8.1f}%"
+        elif baseline:
+            line += f"{'no baseline':>20}"
+        print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="VisionBreaker frame pipeline benchmark")
+    parser.add_argument("--frames", type=int, default=120, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured frames before each run")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--render-threads", type=int, default=1, help="rain strip worker threads")
+    parser.add_argument("--palette", action="store_true", help="8-bit palette-indexed scene")
+    parser.add_argument(
+        "--renderer",
+        choices=vb.RENDERER_BACKENDS,
+        default="surface",
+        help="draw with Surface blits or an SDL2 Renderer (no palette or threads)",
+    )
+    parser.add_argument(
+        "--resolutions",
+        nargs="+",
+        choices=sorted(RESOLUTIONS),
+        default=["default", "1080p", "4k"],
+        help="resolutions to run (8k is opt-in, it is slow)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=sorted(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument(
+        "--fail-over",
+        type=float,
+        default=None,
+        metavar="PCT",
+        help="exit non-zero if any total p50 is this many percent slower than baseline",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    vb.renderer_backend = args.renderer
+    vb.render_threads = max(1, args.render_threads) if args.renderer == "surface" else 1
+    vb.palette_mode = args.palette and args.renderer == "surface"
+    vb.start_render_pool()
+
+    results = {}
+    regressions = []
+    unbaselined = []
+    for res_name in args.resolutions:
+        for scenario in args.scenarios:
+            name = f"{res_name}/{scenario}"
+            samples = run_scenario(
+                RESOLUTIONS[res_name], SCENARIOS[scenario], args.frames, args.warmup, args.seed
+            )
+            summary = summarize(samples)
+            results[name] = summary
+            print_summary(name, summary, baseline.get(name))
+
+            if name not in baseline:
+                unbaselined.append(name)
+            elif args.fail_over is not None:
+                base = baseline[name]["total"]["p50"]
+                if base > 0 and (summary["total"]["p50"] - base) / base * 100.0 > args.fail_over:
+                    regressions.append(name)
+
+    vb.stop_render_pool()
+    vb.close_renderer()
+    vb.pygame.quit()
+
+    if args.save_baseline:
+        # Keep entries for scenarios that were not part of this run
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                merged = json.load(f)
+        merged.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+
+    if unbaselined and not args.save_baseline:
+        print(f"\nNo baseline in {args.baseline} for: {', '.join(unbaselined)}")
+        print("Record one on this machine with --save-baseline.")
+        if args.fail_over is not None:
+            return 1
+    if regressions:
+        print(f"\nRegressed over {args.fail_over:.1f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Headless memory soak test for VisionBreaker.
+
+Runs the real frame loop for a long time under stress: word rains spawned
+far faster than normal (including random text and characters outside the
+glyph atlas), repeated toggle_fullscreen() / init_surfaces() cycles, theme
+changes and critical errors. Memory is sampled with VisionBreaker's
+instrumentation mode and the run fails if RSS, the Python heap or the
+number of live Surfaces keeps growing once caches are warm:
+
+    python soak_test.py --hours 8 --memory-log soak.jsonl
+    python soak_test.py --minutes 5                        # quick check
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# Headless before VisionBreaker / SDL initialize anything
+os.environ["VISIONBREAKER_HEADLESS"] = "1"
+
+import VisionBreaker as vb
+
+# Characters outside the prebuilt atlas, so extra glyphs keep being rendered
+EXOTIC_CHARS = "ÄÖÜßÆØÅÇÉÑ¿¡§¶µ±÷×€£¥©®°¼½¾ΣΩπλΔ"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="VisionBreaker memory soak test")
+    duration = parser.add_mutually_exclusive_group()
+    duration.add_argument("--hours", type=float, help="wall-clock run time")
+    duration.add_argument("--minutes", type=float, help="wall-clock run time (default: 10)")
+    duration.add_argument("--frames", type=int, help="run a fixed number of frames instead")
+    parser.add_argument("--resolution", type=vb.parse_resolution, default=(1280, 720))
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--spawn-per-frame", type=int, default=2, help="word rains spawned each frame")
+    parser.add_argument("--resize-every", type=int, default=1000, help="frames between fullscreen toggles")
+    parser.add_argument("--theme-every", type=int, default=150, help="frames between theme changes")
+    parser.add_argument("--critical-every", type=int, default=900, help="frames between critical errors")
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=3000,
+        help="frames before the memory baseline is taken (caches fill up)",
+    )
+    parser.add_argument(
+        "--memory-interval",
+        type=int,
+        default=vb.MEMORY_DEFAULT_INTERVAL,
+        help="frames between memory samples",
+    )
+    parser.add_argument("--memory-log", metavar="PATH", help="also write the samples as JSON lines")
+    parser.add_argument("--max-rss-growth", type=float, default=32.0, metavar="MB")
+    parser.add_argument("--max-python-growth", type=float, default=4.0, metavar="MB")
+    parser.add_argument("--max-surface-growth", type=int, default=16, metavar="COUNT")
+    return parser.parse_args(argv)
+
+
+def random_text(rng):
+    """A random word rain text, sometimes with characters the atlas lacks."""
+    length = rng.randint(3, 14)
+    alphabet = vb.WORD_RAIN_ALPHABET
+    if rng.random() < 0.2:
+        alphabet += EXOTIC_CHARS
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def stress_frame(frame, args, rng):
+    """Apply this frame's share of spawns, resizes, theme changes and errors."""
+    for _ in range(args.spawn_per_frame):
+        if rng.random() < 0.5:
+            vb.spawn_word_rain()
+        else:
+            vb.spawn_word_rain_from_text(random_text(rng))
+    if args.resize_every and frame % args.resize_every == args.resize_every - 1:
+        vb.toggle_fullscreen()
+    if args.theme_every and frame % args.theme_every == args.theme_every - 1:
+        vb.next_theme()
+    if args.critical_every and frame % args.critical_every == args.critical_every - 1:
+        vb.trigger_critical_error()
+
+
+def window_growth(samples, key):
+    """Largest value in the last third of samples minus the largest in the first third."""
+    third = max(1, len(samples) // 3)
+    first = [s[key] for s in samples[:third] if s[key] is not None]
+    last = [s[key] for s in samples[-third:] if s[key] is not None]
+    if not first or not last:
+        return None
+    return max(last) - max(first)
+
+
+def check_growth(samples, args):
+    """Return a list of failure messages for memory that kept growing."""
+    if len(samples) < 3:
+        return ["too few samples after warmup to judge growth; run longer"]
+    failures = []
+    limits = (
+        ("rss_kb", args.max_rss_growth * 1024, "RSS", "KiB"),
+        ("python_kb", args.max_python_growth * 1024, "Python heap", "KiB"),
+        ("surfaces_live", args.max_surface_growth, "live Surfaces", "Surfaces"),
+    )
+    for key, limit, label, unit in limits:
+        growth = window_growth(samples, key)
+        if growth is None:
+            print(f"{label}: not available on this platform")
+            continue
+        print(f"{label} growth: {growth:+.0f} {unit} (limit {limit:.0f})")
+        if growth > limit:
+            failures.append(f"{label} grew by {growth:.0f} {unit}")
+    return failures
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.frames is not None:
+        deadline, frames = None, args.frames
+    else:
+        minutes = args.hours * 60 if args.hours is not None else (args.minutes or 10.0)
+        deadline, frames = time.perf_counter() + minutes * 60, None
+
+    rng = random.Random(args.seed)
+    vb.seed_random(args.seed)
+    vb.start_memory_instrumentation(args.memory_log, args.memory_interval)
+    vb.init_display(offscreen=True, resolution=args.resolution)
+    vb.init_surfaces()
+
+    dt_ms = 1000.0 / vb.SIM_FPS
+    frame = 0
+    last_seen = None
+    samples = []
+    while True:
+        if frames is not None and frame >= frames:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        stress_frame(frame, args, rng)
+        vb.run_frame(dt_ms, present=False)
+        frame += 1
+
+        if frame == args.warmup:
+            vb.reset_memory_baseline()
+        sample = vb.memory_samples[-1] if vb.memory_samples else None
+        if sample is not last_seen:
+            last_seen = sample
+            if frame > args.warmup:
+                samples.append(sample)
+            print(
+                f"frame {sample['frame']:>8}  rss {sample['rss_kb']} KiB  "
+                f"python {sample['python_kb']} KiB  surfaces {sample['surfaces_live']}  "
+                f"created/frame {sample['surfaces_per_frame']}  word rains {sample['word_rains']}",
+                flush=True,
+            )
+
+    vb.stop_memory_instrumentation()
+    vb.pygame.quit()
+
+    print(f"\n{frame} frames, {len(samples)} samples after warmup")
+    failures = check_growth(samples, args)
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        return 1
+    print("PASS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
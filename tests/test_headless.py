@@ -0,0 +1,127 @@
+"""
+Headless regression checks for the renderer: runs that must draw the same
+pixels as a plain single-threaded render. Each run is a separate
+VisionBreaker.py process on SDL's dummy drivers, so no display is needed.
+"""
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+import pygame
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "VisionBreaker.py")
+SEEDED_RUN = ("--headless", "--seed", "5", "--frames", "90", "--quality", "high", "--resolution", "480x270")
+
+
+def run_headless(tmp_path, name, *args):
+    """Run VisionBreaker.py headless with args; returns its --screenshot as an array."""
+    screenshot = str(tmp_path / f"{name}.png")
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    env.pop("VISIONBREAKER_FPS", None)
+    result = subprocess.run(
+        [sys.executable, SCRIPT, *args, "--screenshot", screenshot],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return pygame.surfarray.array3d(pygame.image.load(screenshot))
+
+
+def write_input_log(path, frames, **options):
+    """Write a --replay-input log of frames (each a list of (key, unicode) presses) at 30 fps."""
+    header = {
+        "version": 2, "seed": 5, "resolution": [480, 270], "render_scale": 1.0, "palette": False,
+        "quality": "high", "fps": 30, "render_threads": 1, "tiles": 1, "render_processes": 0,
+        "renderer": "surface",
+    }
+    header.update(options)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for i, keys in enumerate(frames):
+            entry = {"phase": "main", "t": round((i + 1) * 1000 / 30, 3), "dt": 1000 / 30}
+            if keys:
+                entry["keys"] = [list(key) for key in keys]
+            f.write(json.dumps(entry) + "\n")
+
+
+@pytest.fixture(scope="module")
+def serial(tmp_path_factory):
+    """The seeded run drawn by one thread, which every other mode must match."""
+    return run_headless(tmp_path_factory.mktemp("serial"), "serial", *SEEDED_RUN)
+
+
+def test_render_threads_match_serial(tmp_path, serial):
+    threaded = run_headless(tmp_path, "threaded", *SEEDED_RUN, "--render-threads", "3")
+    assert np.array_equal(threaded, serial)
+
+
+def test_tiles_match_serial(tmp_path, serial):
+    tiled = run_headless(tmp_path, "tiled", *SEEDED_RUN, "--tiles", "3")
+    assert np.array_equal(tiled, serial)
+
+
+def test_render_processes_match_serial(tmp_path, serial):
+    composited = run_headless(tmp_path, "composited", *SEEDED_RUN, "--render-processes", "2")
+    assert np.array_equal(composited, serial)
+
+
+def test_render_processes_draw_long_hack_words(tmp_path):
+    # A HACK> word longer than the shared word rain text once crashed the compositor
+    frames = [[(pygame.K_h, "h")], [(pygame.K_a, "a")] * 70, [(pygame.K_RETURN, "\r")]] + [[]] * 40
+    write_input_log(tmp_path / "serial.jsonl", frames)
+    write_input_log(tmp_path / "composited.jsonl", frames, render_processes=2)
+    serial = run_headless(tmp_path, "serial", "--headless", "--replay-input", str(tmp_path / "serial.jsonl"))
+    composited = run_headless(
+        tmp_path, "composited", "--headless", "--replay-input", str(tmp_path / "composited.jsonl")
+    )
+    assert np.array_equal(composited, serial)
+
+
+def test_replay_matches_recording(tmp_path):
+    log = str(tmp_path / "input.jsonl")
+    # --quality auto, so the governor's level changes are replayed too
+    recorded = run_headless(
+        tmp_path, "recorded", "--headless", "--frames", "90", "--resolution", "480x270", "--record-input", log
+    )
+    replayed = run_headless(tmp_path, "replayed", "--headless", "--replay-input", log)
+    assert np.array_equal(replayed, recorded)
+
+
+def test_dirty_rects_match_full_redraws(monkeypatch):
+    monkeypatch.setenv("VISIONBREAKER_HEADLESS", "1")
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    sys.path.insert(0, ROOT)
+    import VisionBreaker as vb
+
+    # Always present through dirty rects, and keep the screen still so it lines up with the scene
+    monkeypatch.setattr(vb, "DIRTY_FULL_AREA", 2)
+    monkeypatch.setattr(vb, "trigger_shake", lambda **kwargs: None)
+    vb.render_scale = 0.5
+    vb.init_display(True, (640, 360))
+    vb.init_surfaces()
+    vb.seed_random(4)
+    vb.unlocked_themes = 3
+    vb.dirty_rects_enabled = True
+    try:
+        for frame in range(120):
+            if frame == 80:
+                vb.next_theme()
+                vb.spawn_word_rain()
+            vb.run_frame(1000 / 30)
+            full = pygame.transform.scale(vb.scene_surface, (vb.WIDTH, vb.HEIGHT))
+            outside_ui = np.ones((vb.WIDTH, vb.HEIGHT), dtype=bool)
+            for rect in vb.presented_ui_rects:
+                rect = rect.clip(vb.screen.get_rect())
+                outside_ui[rect.left:rect.right, rect.top:rect.bottom] = False
+            presented = pygame.surfarray.array3d(vb.screen)[outside_ui]
+            assert np.array_equal(presented, pygame.surfarray.array3d(full)[outside_ui]), frame
+    finally:
+        vb.stop_render_pool()
+        pygame.quit()